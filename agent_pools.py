@@ -2,10 +2,11 @@ import argparse
 import os
 import dotenv
 
-from pytfe import TFEClient, TFEConfig
+import jsonapi
+import names
+import session
 from pytfe.models import (
     AgentPoolCreateOptions,
-    AgentPoolListOptions,
     AgentPoolReadOptions,
     AgentPoolUpdateOptions,
 )
@@ -21,18 +22,24 @@ def create(name, description=None):
     except Exception as e:
         print(f"Error creating agent pool: {e}")
 
+def find_pool_id(name):
+    """Find an agent pool ID by exact name, fetching only the name field"""
+    return jsonapi.find_id(
+        http,
+        f"/api/v2/organizations/{org}/agent-pools",
+        "agent-pools",
+        name,
+        params={"q": name},
+    )
+
 def read(name=None, pool_id=None):
     """Read agent pool details by name or ID"""
     try:
         # If name is provided, list and find it
         if name and not pool_id:
-            pools = client.agent_pools.list(org, AgentPoolListOptions())
-            for pool in pools:
-                if pool.name == name:
-                    pool_id = pool.id
-                    break
-            else:
-                print(f"Agent pool '{name}' not found")
+            pool_id = find_pool_id(name)
+            if not pool_id:
+                print(f"Agent pool '{name}' not found{names.did_you_mean(org, 'agent-pools', name)}")
                 return
         
         if not pool_id:
@@ -53,15 +60,19 @@ def read(name=None, pool_id=None):
 def list():
     """List all agent pools in the organization"""
     try:
-        pools = client.agent_pools.list(org, AgentPoolListOptions())
+        pools = [*jsonapi.paginate(
+            http,
+            f"/api/v2/organizations/{org}/agent-pools",
+            params=jsonapi.sparse_fields("agent-pools", "name", "agent-count"),
+        )]
         
         if not pools:
             print("No agent pools found")
             return
         
         for pool in pools:
-            agent_count = pool.agent_count if hasattr(pool, 'agent_count') else 'N/A'
-            print(f"- {pool.name} (ID: {pool.id}, Agents: {agent_count})")
+            agent_count = pool["attributes"].get("agent-count", "N/A")
+            print(f"- {pool['attributes']['name']} (ID: {pool['id']}, Agents: {agent_count})")
     except Exception as e:
         print(f"Error listing agent pools: {e}")
 
@@ -70,13 +81,9 @@ def update(name=None, pool_id=None, new_name=None, description=None):
     try:
         # If name is provided, find the pool ID
         if name and not pool_id:
-            pools = client.agent_pools.list(org, AgentPoolListOptions())
-            for pool in pools:
-                if pool.name == name:
-                    pool_id = pool.id
-                    break
-            else:
-                print(f"Agent pool '{name}' not found")
+            pool_id = find_pool_id(name)
+            if not pool_id:
+                print(f"Agent pool '{name}' not found{names.did_you_mean(org, 'agent-pools', name)}")
                 return
         
         if not pool_id:
@@ -99,13 +106,9 @@ def delete(name=None, pool_id=None):
     try:
         # If name is provided, find the pool ID
         if name and not pool_id:
-            pools = client.agent_pools.list(org, AgentPoolListOptions())
-            for pool in pools:
-                if pool.name == name:
-                    pool_id = pool.id
-                    break
-            else:
-                print(f"Agent pool '{name}' not found")
+            pool_id = find_pool_id(name)
+            if not pool_id:
+                print(f"Agent pool '{name}' not found{names.did_you_mean(org, 'agent-pools', name)}")
                 return
         
         if not pool_id:
@@ -121,7 +124,9 @@ if __name__ == "__main__":
     dotenv.load_dotenv()
     
     org = os.getenv("TFE_ORGANIZATION")
-    client = TFEClient(TFEConfig())
+    client = session.create_client()
+    # Raw JSON:API calls share the SDK client's connection pool
+    http = client._transport
     
     parser = argparse.ArgumentParser(description="Agent Pool management CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -2,7 +2,8 @@ import argparse
 import os
 import dotenv
 
-from pytfe import TFEClient, TFEConfig
+import names
+import session
 from pytfe.models import (
     AgentTokenCreateOptions,
     AgentTokenListOptions,
@@ -19,7 +20,7 @@ def create(pool_name=None, pool_id=None, description=None):
                     pool_id = pool.id
                     break
             else:
-                print(f"Agent pool '{pool_name}' not found")
+                print(f"Agent pool '{pool_name}' not found{names.did_you_mean(org, 'agent-pools', pool_name)}")
                 return
         
         if not pool_id:
@@ -59,7 +60,7 @@ def list(pool_name=None, pool_id=None):
                     pool_id = pool.id
                     break
             else:
-                print(f"Agent pool '{pool_name}' not found")
+                print(f"Agent pool '{pool_name}' not found{names.did_you_mean(org, 'agent-pools', pool_name)}")
                 return
         
         if not pool_id:
@@ -90,7 +91,7 @@ if __name__ == "__main__":
     dotenv.load_dotenv()
     
     org = os.getenv("TFE_ORGANIZATION")
-    client = TFEClient(TFEConfig())
+    client = session.create_client()
     
     parser = argparse.ArgumentParser(description="Agent Token management CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -0,0 +1,464 @@
+"""Asyncio client backend for fan-out operations.
+
+Mirrors the pytfe resource methods the scripts use, on top of
+httpx.AsyncClient, so bulk commands can keep many requests in flight on a
+single thread. Methods accept the same pytfe options models and return raw
+JSON:API resource objects, like the helpers in jsonapi.py.
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import httpx
+from pytfe import TFEConfig
+from pytfe._jsonapi import build_headers, parse_error_payload
+from pytfe.errors import AuthError, NotFound, RateLimited, ServerError, TFEError
+from pytfe.resources.workspaces import Workspaces as _WorkspacePayloads
+
+import hedge
+import jsonapi
+import limiter
+import session
+import singleflight
+
+# Statuses retried with backoff, matching pytfe's HTTPTransport
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def attributes(options):
+    """Serialize a pytfe options model to JSON:API attributes"""
+    dumped = options.model_dump(mode="json", by_alias=True, exclude_none=True)
+    return {key.replace("_", "-"): value for key, value in dumped.items()}
+
+
+def resource_body(resource_type, attrs, relationships=None):
+    """Build a JSON:API request body for a single resource"""
+    body = {"data": {"type": resource_type, "attributes": attrs}}
+    if relationships:
+        body["data"]["relationships"] = relationships
+    return body
+
+
+class AsyncTFEClient:
+    """Async counterpart of TFEClient, configured from the same TFEConfig
+
+    Use as an async context manager so the connection pool is closed on the
+    event loop that opened it. Requests are admitted by an AdaptiveLimiter,
+    the process-wide one for the host unless limit is given. Concurrent
+    identical GETs and name lookups share one in-flight call, and GETs are
+    hedged when TFE_HEDGE is set (see hedge.py); coalesce=False and
+    hedging=False turn these off, e.g. to measure every request. With
+    TFE_TRACE set, request statistics are written to stderr when the client
+    closes.
+    """
+
+    def __init__(self, config=None, *, max_connections=None, max_keepalive_connections=None, limit=None, hedger=None, coalesce=True, hedging=True):
+        config = config or TFEConfig.from_env()
+        self.config = config
+        self.base = config.address.rstrip("/")
+        self.limiter = limit or limiter.shared(self.base)
+        self.headers = build_headers(config.user_agent_suffix)
+        if config.token:
+            self.headers["Authorization"] = f"Bearer {config.token}"
+        # Responses per negotiated protocol, e.g. {"HTTP/2": 120}
+        self.http_versions = Counter()
+        self.inflight = singleflight.Group()
+        self.coalesce = coalesce
+        self.hedger = (hedger or hedge.from_env()) if hedging else None
+        self._client = httpx.AsyncClient(
+            base_url=self.base,
+            headers=self.headers,
+            **session.client_options(config, max_connections, max_keepalive_connections),
+        )
+
+        self.projects = Projects(self)
+        self.workspaces = Workspaces(self)
+        self.variables = Variables(self)
+        self.variable_sets = VariableSets(self)
+        self.variable_set_variables = VariableSetVariables(self)
+        self.policy_sets = PolicySets(self)
+        self.agent_pools = AgentPools(self)
+        self.teams = Teams(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+        if os.getenv("TFE_TRACE"):
+            print(f"trace: {self.stats()}", file=sys.stderr)
+
+    def stats(self):
+        """Request statistics: protocols, coalesced GETs, concurrency and hedging"""
+        stats = {
+            "responses": dict(self.http_versions),
+            "coalesced": self.inflight.coalesced,
+            "limiter": self.limiter.stats(),
+        }
+        if self.hedger:
+            stats["hedge"] = self.hedger.stats()
+        return stats
+
+    async def negotiate(self):
+        """Open a connection with a cheap request and return its protocol
+
+        With HTTP/2 enabled, httpx sends every later request as a stream on
+        this connection instead of opening one connection per request.
+        """
+        try:
+            response = await self._client.get("/api/v2/ping")
+        except httpx.HTTPError:
+            return None
+        return response.http_version
+
+    async def request(self, method, path, *, params=None, json_body=None):
+        """Send a request, retrying transport errors and 429/5xx with backoff
+
+        GETs are idempotent, so concurrent identical ones are coalesced and,
+        if enabled, hedged.
+        """
+        if method == "GET" and self.coalesce:
+            key = singleflight.request_key(method, path, params)
+            return await self.inflight.do(key, lambda: self._request(method, path, params, json_body))
+        return await self._request(method, path, params, json_body)
+
+    async def _request(self, method, path, params, json_body):
+        attempt = 0
+        while True:
+            try:
+                response = await self._send(method, path, params, json_body)
+            except httpx.HTTPError as e:
+                if attempt >= self.config.max_retries:
+                    raise ServerError(str(e)) from e
+                await self._sleep(attempt, None)
+                attempt += 1
+                continue
+            self.http_versions[response.http_version] += 1
+            if response.status_code in RETRY_STATUSES and attempt < self.config.max_retries:
+                await self._sleep(attempt, retry_after(response))
+                attempt += 1
+                continue
+            raise_for_status(response)
+            return response
+
+    async def _send(self, method, path, params, json_body):
+        """Send one attempt once the limiter admits it, feeding back its outcome"""
+        await self.limiter.acquire()
+        latency = None
+        overloaded = False
+        try:
+            start = time.monotonic()
+            send = lambda: self._client.request(method, path, params=params, json=json_body)
+            if self.hedger and method == "GET":
+                # Hedge once admitted, so the p95 reflects the server rather than our queue
+                response = await self.hedger.run(send)
+            else:
+                response = await send()
+            latency = time.monotonic() - start
+            overloaded = response.status_code in limiter.OVERLOAD_STATUSES
+            return response
+        except httpx.TransportError:
+            # Connection failures and timeouts; a cancelled request or a local
+            # error releases its slot without feedback instead
+            overloaded = True
+            raise
+        finally:
+            await self.limiter.release(latency, overloaded)
+
+    async def _sleep(self, attempt, delay):
+        if delay is None:
+            delay = min(self.config.backoff_cap, self.config.backoff_base * (2**attempt))
+            if self.config.backoff_jitter:
+                delay *= random.uniform(0.5, 1.0)
+        await asyncio.sleep(delay)
+
+    async def get(self, path, params=None):
+        """Fetch a single resource, returning it with its side-loaded resources"""
+        document = (await self.request("GET", path, params=params)).json() or {}
+        return document.get("data"), jsonapi.index_included(document)
+
+    async def paginate(self, path, params=None, page_size=jsonapi.PAGE_SIZE, included=None):
+        """Async version of jsonapi.paginate"""
+        page = 1
+        while True:
+            query = dict(params or {})
+            query["page[number]"] = page
+            query["page[size]"] = page_size
+            document = (await self.request("GET", path, params=query)).json() or {}
+            data = document.get("data", [])
+            if included is not None:
+                included.update(jsonapi.index_included(document))
+            for item in data:
+                yield item
+
+            pagination = document.get("meta", {}).get("pagination", {})
+            next_page = pagination.get("next-page")
+            if next_page:
+                page = next_page
+            elif pagination or len(data) < page_size:
+                break
+            else:
+                page += 1
+
+    async def fetch_all(self, path, params=None, page_size=jsonapi.PAGE_SIZE):
+        """Return every resource of a collection, fetching pages after the first concurrently
+
+        Falls back to paginate when the first page has no total-pages.
+        """
+        query = dict(params or {})
+        query["page[size]"] = page_size
+        document = (await self.request("GET", path, params={**query, "page[number]": 1})).json() or {}
+        total = document.get("meta", {}).get("pagination", {}).get("total-pages")
+        if total is None:
+            return [item async for item in self.paginate(path, params, page_size)]
+
+        async def page(number):
+            response = await self.request("GET", path, params={**query, "page[number]": number})
+            return (response.json() or {}).get("data", [])
+
+        pages = await asyncio.gather(*(page(number) for number in range(2, total + 1)))
+        return [*document.get("data", []), *(item for data in pages for item in data)]
+
+    async def find_by_name(self, path, resource_type, name, fields=("name",), params=None):
+        """Async version of jsonapi.find_by_name
+
+        Concurrent lookups of the same name share one scan.
+        """
+        if "name" not in fields:
+            fields = ("name", *fields)
+        query = dict(params or {})
+        query.update(jsonapi.sparse_fields(resource_type, *fields))
+
+        async def scan():
+            async for item in self.paginate(path, params=query):
+                if item.get("attributes", {}).get("name") == name:
+                    return item
+            return None
+
+        return await self.inflight.do(("find", name, *singleflight.request_key("GET", path, query)), scan)
+
+    async def find_id(self, path, resource_type, name, params=None):
+        """Async version of jsonapi.find_id"""
+        item = await self.find_by_name(path, resource_type, name, params=params)
+        return item["id"] if item else None
+
+
+def retry_after(response):
+    """Parse a Retry-After header in seconds, or None"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+def raise_for_status(response):
+    """Raise the pytfe error matching an unsuccessful response"""
+    status = response.status_code
+    if 200 <= status < 300:
+        return
+    try:
+        errors = parse_error_payload(response.json())
+    except Exception:
+        errors = []
+    message = f"HTTP {status}"
+    if errors and isinstance(errors[0], dict):
+        message = errors[0].get("detail") or errors[0].get("title") or message
+    elif errors and isinstance(errors[0], str):
+        message = errors[0]
+    if status in (401, 403):
+        raise AuthError(message, status=status, errors=errors)
+    if status == 404:
+        raise NotFound(message, status=status, errors=errors)
+    if status == 429:
+        raise RateLimited(message, status=status, errors=errors, retry_after=retry_after(response))
+    if status >= 500:
+        raise ServerError(message, status=status, errors=errors)
+    raise TFEError(message, status=status, errors=errors)
+
+
+class _Resource:
+    def __init__(self, client):
+        self.client = client
+
+    async def _data(self, method, path, **kwargs):
+        response = await self.client.request(method, path, **kwargs)
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json().get("data")
+
+    async def _relationship(self, method, path, resource_type, ids):
+        await self.client.request(method, path, json_body=jsonapi.relationship_data(resource_type, ids))
+
+
+class Projects(_Resource):
+    def list(self, organization, params=None):
+        return self.client.paginate(f"/api/v2/organizations/{organization}/projects", params=params)
+
+    async def read(self, project_id, params=None):
+        return await self._data("GET", f"/api/v2/projects/{project_id}", params=params)
+
+    async def create(self, organization, options):
+        body = resource_body("projects", attributes(options))
+        return await self._data("POST", f"/api/v2/organizations/{organization}/projects", json_body=body)
+
+    async def update(self, project_id, options):
+        body = resource_body("projects", attributes(options))
+        return await self._data("PATCH", f"/api/v2/projects/{project_id}", json_body=body)
+
+    async def delete(self, project_id):
+        await self.client.request("DELETE", f"/api/v2/projects/{project_id}")
+
+
+class Workspaces(_Resource):
+    # pytfe's payload builder does not use its transport, so reuse it for identical request bodies
+    _payloads = _WorkspacePayloads(None)
+
+    def list(self, organization, params=None, included=None):
+        return self.client.paginate(f"/api/v2/organizations/{organization}/workspaces", params=params, included=included)
+
+    async def read(self, workspace, *, organization, params=None):
+        return await self._data("GET", f"/api/v2/organizations/{organization}/workspaces/{workspace}", params=params)
+
+    async def read_by_id(self, workspace_id, params=None):
+        return await self._data("GET", f"/api/v2/workspaces/{workspace_id}", params=params)
+
+    async def create(self, organization, options):
+        body = self._payloads._build_workspace_payload(options, is_create=True)
+        return await self._data("POST", f"/api/v2/organizations/{organization}/workspaces", json_body=body)
+
+    async def update(self, workspace, options, *, organization):
+        body = self._payloads._build_workspace_payload(options, is_create=False)
+        return await self._data("PATCH", f"/api/v2/organizations/{organization}/workspaces/{workspace}", json_body=body)
+
+    async def update_by_id(self, workspace_id, options):
+        body = self._payloads._build_workspace_payload(options, is_create=False)
+        return await self._data("PATCH", f"/api/v2/workspaces/{workspace_id}", json_body=body)
+
+    async def delete(self, workspace, *, organization):
+        await self.client.request("DELETE", f"/api/v2/organizations/{organization}/workspaces/{workspace}")
+
+    async def delete_by_id(self, workspace_id):
+        await self.client.request("DELETE", f"/api/v2/workspaces/{workspace_id}")
+
+    async def safe_delete_by_id(self, workspace_id):
+        await self.client.request("POST", f"/api/v2/workspaces/{workspace_id}/actions/safe-delete")
+
+    async def lock(self, workspace_id, options):
+        return await self._data("POST", f"/api/v2/workspaces/{workspace_id}/actions/lock", json_body={"reason": options.reason})
+
+    async def unlock(self, workspace_id):
+        return await self._data("POST", f"/api/v2/workspaces/{workspace_id}/actions/unlock")
+
+
+class Variables(_Resource):
+    def list(self, workspace_id):
+        return self.client.paginate(f"/api/v2/workspaces/{workspace_id}/vars")
+
+    async def create(self, workspace_id, options):
+        body = resource_body("vars", attributes(options))
+        return await self._data("POST", f"/api/v2/workspaces/{workspace_id}/vars", json_body=body)
+
+    async def update(self, workspace_id, variable_id, options):
+        body = resource_body("vars", attributes(options))
+        return await self._data("PATCH", f"/api/v2/workspaces/{workspace_id}/vars/{variable_id}", json_body=body)
+
+    async def delete(self, workspace_id, variable_id):
+        await self.client.request("DELETE", f"/api/v2/workspaces/{workspace_id}/vars/{variable_id}")
+
+
+class VariableSets(_Resource):
+    def list(self, organization, params=None):
+        return self.client.paginate(f"/api/v2/organizations/{organization}/varsets", params=params)
+
+    async def read(self, variable_set_id, params=None):
+        return await self._data("GET", f"/api/v2/varsets/{variable_set_id}", params=params)
+
+    async def create(self, organization, options):
+        body = resource_body("varsets", attributes(options))
+        return await self._data("POST", f"/api/v2/organizations/{organization}/varsets", json_body=body)
+
+    async def update(self, variable_set_id, options):
+        body = resource_body("varsets", attributes(options))
+        return await self._data("PATCH", f"/api/v2/varsets/{variable_set_id}", json_body=body)
+
+    async def delete(self, variable_set_id):
+        await self.client.request("DELETE", f"/api/v2/varsets/{variable_set_id}")
+
+    async def apply_to_workspaces(self, variable_set_id, workspace_ids):
+        await self._relationship("POST", f"/api/v2/varsets/{variable_set_id}/relationships/workspaces", "workspaces", workspace_ids)
+
+    async def remove_from_workspaces(self, variable_set_id, workspace_ids):
+        await self._relationship("DELETE", f"/api/v2/varsets/{variable_set_id}/relationships/workspaces", "workspaces", workspace_ids)
+
+    async def apply_to_projects(self, variable_set_id, project_ids):
+        await self._relationship("POST", f"/api/v2/varsets/{variable_set_id}/relationships/projects", "projects", project_ids)
+
+    async def remove_from_projects(self, variable_set_id, project_ids):
+        await self._relationship("DELETE", f"/api/v2/varsets/{variable_set_id}/relationships/projects", "projects", project_ids)
+
+
+class VariableSetVariables(_Resource):
+    def list(self, variable_set_id):
+        return self.client.paginate(f"/api/v2/varsets/{variable_set_id}/relationships/vars")
+
+    async def create(self, variable_set_id, options):
+        body = resource_body("vars", attributes(options))
+        return await self._data("POST", f"/api/v2/varsets/{variable_set_id}/relationships/vars", json_body=body)
+
+    async def update(self, variable_set_id, variable_id, options):
+        body = resource_body("vars", attributes(options))
+        return await self._data("PATCH", f"/api/v2/varsets/{variable_set_id}/relationships/vars/{variable_id}", json_body=body)
+
+    async def delete(self, variable_set_id, variable_id):
+        await self.client.request("DELETE", f"/api/v2/varsets/{variable_set_id}/relationships/vars/{variable_id}")
+
+
+class PolicySets(_Resource):
+    def list(self, organization, params=None, included=None):
+        return self.client.paginate(f"/api/v2/organizations/{organization}/policy-sets", params=params, included=included)
+
+    async def read(self, policy_set_id, params=None):
+        return await self._data("GET", f"/api/v2/policy-sets/{policy_set_id}", params=params)
+
+    async def delete(self, policy_set_id):
+        await self.client.request("DELETE", f"/api/v2/policy-sets/{policy_set_id}")
+
+    async def add_policies(self, policy_set_id, policy_ids):
+        await self._relationship("POST", f"/api/v2/policy-sets/{policy_set_id}/relationships/policies", "policies", policy_ids)
+
+    async def remove_policies(self, policy_set_id, policy_ids):
+        await self._relationship("DELETE", f"/api/v2/policy-sets/{policy_set_id}/relationships/policies", "policies", policy_ids)
+
+    async def add_workspaces(self, policy_set_id, workspace_ids):
+        await self._relationship("POST", f"/api/v2/policy-sets/{policy_set_id}/relationships/workspaces", "workspaces", workspace_ids)
+
+    async def remove_workspaces(self, policy_set_id, workspace_ids):
+        await self._relationship("DELETE", f"/api/v2/policy-sets/{policy_set_id}/relationships/workspaces", "workspaces", workspace_ids)
+
+    async def add_projects(self, policy_set_id, project_ids):
+        await self._relationship("POST", f"/api/v2/policy-sets/{policy_set_id}/relationships/projects", "projects", project_ids)
+
+    async def remove_projects(self, policy_set_id, project_ids):
+        await self._relationship("DELETE", f"/api/v2/policy-sets/{policy_set_id}/relationships/projects", "projects", project_ids)
+
+
+class AgentPools(_Resource):
+    def list(self, organization, params=None):
+        return self.client.paginate(f"/api/v2/organizations/{organization}/agent-pools", params=params)
+
+    async def read(self, agent_pool_id, params=None):
+        return await self._data("GET", f"/api/v2/agent-pools/{agent_pool_id}", params=params)
+
+
+class Teams(_Resource):
+    def list(self, organization, params=None, included=None):
+        return self.client.paginate(f"/api/v2/organizations/{organization}/teams", params=params, included=included)
+
+    async def read(self, team_id, params=None):
+        return await self._data("GET", f"/api/v2/teams/{team_id}", params=params)
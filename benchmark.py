@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import dotenv
+
+import jsonapi
+import limiter
+import session
+from async_client import AsyncTFEClient
+from pytfe import TFEConfig
+
+async def fire(config, path, params, requests, workers, max_connections):
+    """Send the same GET requests with at most workers in flight
+
+    Returns:
+        Tuple of (elapsed seconds, per-request latencies, failures, negotiated protocols)
+    """
+    limit = asyncio.Semaphore(max(1, workers))
+    latencies = []
+    failures = 0
+
+    async def one(aclient):
+        nonlocal failures
+        async with limit:
+            start = time.monotonic()
+            try:
+                await aclient.request("GET", path, params=params)
+                latencies.append(time.monotonic() - start)
+            except Exception:
+                failures += 1
+
+    # Hold concurrency fixed so the protocols are compared like for like, and
+    # send every request: identical GETs would otherwise be coalesced or hedged
+    fixed = limiter.AdaptiveLimiter(initial=workers, minimum=workers, maximum=workers)
+    async with AsyncTFEClient(config, max_connections=max_connections, limit=fixed, coalesce=False, hedging=False) as aclient:
+        await aclient.negotiate()
+        start = time.monotonic()
+        await asyncio.gather(*(one(aclient) for _ in range(requests)))
+        return time.monotonic() - start, latencies, failures, dict(aclient.http_versions)
+
+def report(label, elapsed, latencies, failures, protocols):
+    ordered = sorted(latencies) or [0.0]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    rate = len(latencies) / elapsed if elapsed else 0.0
+    print(f"{label:<24} {rate:>8.1f} req/s  p50 {statistics.median(ordered) * 1000:>7.1f}ms  p95 {p95 * 1000:>7.1f}ms  "
+          f"failed {failures}  ({', '.join(f'{v}: {n}' for v, n in protocols.items())})")
+
+def benchmark(requests=500, workers=50, streams=None):
+    """Compare pooled HTTP/1.1 against HTTP/2 multiplexed over one connection
+
+    Both modes send the same read-only request (the first workspace page with
+    a sparse fieldset) against TFE_ADDRESS with the same number in flight.
+    """
+    path = f"/api/v2/organizations/{org}/workspaces"
+    params = {"page[size]": 1, **jsonapi.sparse_fields("workspaces", "name")}
+    streams = session.max_streams(streams)
+    modes = [
+        (f"HTTP/1.1, {workers} connections", TFEConfig(http2=False), workers, workers),
+        (f"HTTP/2, {min(workers, streams)} streams", TFEConfig(http2=True), min(workers, streams), 1),
+    ]
+    print(f"{requests} requests to {TFEConfig().address}{path}")
+    for label, config, in_flight, connections in modes:
+        try:
+            elapsed, latencies, failures, protocols = asyncio.run(fire(config, path, params, requests, in_flight, connections))
+            report(label, elapsed, latencies, failures, protocols)
+            if config.http2 and "HTTP/2" not in protocols:
+                print("  Server did not negotiate HTTP/2 (plain http:// or no ALPN), requests were serialized on one connection")
+        except Exception as e:
+            print(f"Error benchmarking {label}: {e}")
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+
+    org = os.getenv("TFE_ORGANIZATION")
+
+    parser = argparse.ArgumentParser(description="Benchmark HTTP/1.1 pooled vs HTTP/2 multiplexed requests")
+    parser.add_argument("--requests", type=int, default=500, help="Number of requests per mode")
+    parser.add_argument("--workers", type=int, default=50, help="Requests in flight")
+    parser.add_argument("--streams", type=int, help="Maximum concurrent HTTP/2 streams (default TFE_MAX_STREAMS or 100)")
+    args = parser.parse_args()
+
+    benchmark(requests=args.requests, workers=args.workers, streams=args.streams)
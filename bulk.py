@@ -0,0 +1,310 @@
+"""Helpers for commands that act on many workspaces at once.
+
+Targets are resolved with a single filtered listing, then the per-workspace
+action runs as a coroutine on one event loop, bounded by a semaphore and
+sharing a single AsyncTFEClient connection pool. Over HTTP/2 the actions
+are multiplexed as streams on one connection. Within that bound, the
+process-wide AdaptiveLimiter grows or shrinks the requests in flight.
+"""
+import asyncio
+import re
+import sys
+import time
+
+import yaml
+
+import jsonapi
+import limiter
+import names
+import session
+from async_client import AsyncTFEClient
+
+# Upper bound only; the shared AdaptiveLimiter finds the actual concurrency.
+# None stands for limiter.max_in_flight(), read when a command runs so
+# TFE_MAX_IN_FLIGHT from .env applies.
+DEFAULT_WORKERS = None
+
+# Run statuses after which a run no longer holds the workspace
+FINAL_RUN_STATUSES = {
+    "applied",
+    "planned_and_finished",
+    "planned_and_saved",
+    "discarded",
+    "errored",
+    "canceled",
+    "force_canceled",
+}
+
+# Workspace settings copied by clone and migrate, as JSON:API attribute names
+WORKSPACE_SETTINGS = (
+    "allow-destroy-plan",
+    "assessments-enabled",
+    "auto-apply",
+    "auto-apply-run-trigger",
+    "description",
+    "execution-mode",
+    "file-triggers-enabled",
+    "global-remote-state",
+    "queue-all-runs",
+    "speculative-enabled",
+    "terraform-version",
+    "trigger-patterns",
+    "trigger-prefixes",
+    "working-directory",
+)
+
+# Resources sent per relationship add/remove call
+RELATIONSHIP_BATCH = 100
+
+# Workspace fields and side-loads needed by delete_blocker
+DELETE_CHECK_FIELDS = ("resource-count", "current-run")
+DELETE_CHECK_PARAMS = {"include": "current_run", **jsonapi.sparse_fields("runs", "status")}
+
+
+class Skipped(Exception):
+    """Raised by an action to report an item as skipped rather than failed"""
+
+
+def add_selector_arguments(parser, resume=True):
+    """Add the workspace selector and concurrency options to a subcommand parser"""
+    parser.add_argument("--select", type=str, help="Workspace selector: 'name~REGEX' or 'name=EXACT'")
+    parser.add_argument("--tag", type=str, action="append", dest="tags", help="Only workspaces with this tag (can be repeated)")
+    parser.add_argument("--project", type=str, help="Only workspaces in this project (by name)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum concurrent requests, adapted below this (default TFE_MAX_IN_FLIGHT or 64)")
+    parser.add_argument("--dry-run", action="store_true", help="Show the matching workspaces without changing anything")
+    if resume:
+        add_resume_argument(parser)
+
+
+def add_resume_argument(parser):
+    """Add the --resume option to a bulk subcommand parser"""
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its journal, skipping finished work")
+
+
+def confirm(prompt, assume_yes=False):
+    """Ask for confirmation on stdin unless assume_yes is set"""
+    if assume_yes:
+        return True
+    try:
+        return input(f"{prompt} [y/N] ").strip().lower() in ("y", "yes")
+    except EOFError:
+        return False
+
+
+def has_selector(args):
+    """Return True if any workspace selector option was given"""
+    return bool(args.select or args.tags or args.project)
+
+
+def parse_select(select):
+    """Turn a --select expression into a predicate on workspace names"""
+    if not select:
+        return lambda name: True
+    match = re.match(r"^(\w+)\s*([~=])\s*(.*)$", select)
+    if not match or match.group(1) != "name":
+        raise ValueError(f"Unsupported selector '{select}', expected 'name~REGEX' or 'name=EXACT'")
+    _, op, value = match.groups()
+    if op == "=":
+        return lambda name: name == value
+    pattern = re.compile(value)
+    return lambda name: pattern.search(name) is not None
+
+
+def select_workspaces(http, org, select=None, tags=None, project=None, fields=("name",), params=None, included=None):
+    """Resolve the workspaces matching a selector with one filtered listing
+
+    Tag and project filters are applied by the API; the name selector is
+    applied locally to the listed names.
+
+    Args:
+        http: Transport with a request(method, path, params=...) method
+        org: Organization name
+        select: Name selector, see parse_select
+        tags: Tag names every workspace must have
+        project: Project name the workspaces must belong to
+        fields: Workspace attributes to fetch in addition to the name
+        params: Extra query parameters, e.g. include
+        included: Optional dict collecting side-loaded resources by (type, id)
+
+    Returns:
+        List of workspace resource objects, sorted by name
+    """
+    matches = parse_select(select)
+    query = dict(params or {})
+    query.update(jsonapi.sparse_fields("workspaces", *dict.fromkeys(("name", *fields))))
+    if tags:
+        query["search[tags]"] = ",".join(tags)
+    if project:
+        project_id = jsonapi.find_id(
+            http,
+            f"/api/v2/organizations/{org}/projects",
+            "projects",
+            project,
+            params={"filter[names]": project},
+        )
+        if not project_id:
+            raise ValueError(f"Project '{project}' not found{names.did_you_mean(org, 'projects', project)}")
+        query["filter[project][id]"] = project_id
+
+    workspaces = [
+        ws for ws in jsonapi.paginate(http, f"/api/v2/organizations/{org}/workspaces", params=query, included=included)
+        if matches(ws["attributes"]["name"])
+    ]
+    return sorted(workspaces, key=lambda ws: ws["attributes"]["name"])
+
+
+def workspaces_by_name(http, org, names):
+    """Resolve workspace names with one sparse org-wide listing
+
+    Returns:
+        Tuple of (workspace resource objects in the order given, missing names)
+    """
+    wanted = dict.fromkeys(names)
+    found = {}
+    for workspace in jsonapi.paginate(http, f"/api/v2/organizations/{org}/workspaces", params=jsonapi.sparse_fields("workspaces", "name")):
+        name = workspace["attributes"]["name"]
+        if name in wanted:
+            found[name] = workspace
+            if len(found) == len(wanted):
+                break
+    return [found[name] for name in wanted if name in found], [name for name in wanted if name not in found]
+
+
+def chunked(items, size=RELATIONSHIP_BATCH):
+    """Split items into lists of at most size, for batched relationship calls"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def load_secrets(path):
+    """Load sensitive values from a YAML/JSON mapping of key (or category:key) to value
+
+    Used by clone commands, since sensitive variable values cannot be read back.
+    """
+    with open(path) as f:
+        secrets = yaml.safe_load(f) or {}
+    if not isinstance(secrets, dict):
+        raise ValueError(f"Secrets file {path} must be a mapping of variable keys to values")
+    return {str(key): str(value) for key, value in secrets.items()}
+
+
+def secret_value(secrets, attributes):
+    """Look up a sensitive variable's value by category:key, then by key, or None"""
+    return secrets.get(f"{attributes['category']}:{attributes['key']}", secrets.get(attributes["key"]))
+
+
+def delete_blocker(workspace, included):
+    """Return why a workspace should not be deleted, or None if it is idle and empty
+
+    The workspace must have been listed with DELETE_CHECK_FIELDS and
+    DELETE_CHECK_PARAMS so its current run is side-loaded.
+    """
+    attrs = workspace["attributes"]
+    current_run = jsonapi.related(workspace, "current-run", included)
+    if current_run and current_run["attributes"].get("status") not in FINAL_RUN_STATUSES:
+        return f"run {current_run['id']} is {current_run['attributes'].get('status')}"
+    if attrs.get("resource-count"):
+        return f"manages {attrs['resource-count']} resource(s)"
+    return None
+
+
+def run(items, action, workers=DEFAULT_WORKERS, label="Working", key=None, config=None, journal=None):
+    """Apply action to every item with at most workers actions in flight
+
+    When the server negotiates HTTP/2, in-flight actions are also capped at
+    session.max_streams() since they share one connection.
+
+    Args:
+        items: Items to process
+        action: Coroutine function taking (AsyncTFEClient, item); its return
+            value becomes the detail
+        workers: Maximum number of concurrent actions, defaulting to
+            limiter.max_in_flight()
+        label: Progress line prefix
+        key: Callable returning the display name of an item
+        config: TFEConfig for the async client, defaults to the environment
+        journal: Optional Journal; items it marks done are not run again and
+            every outcome is recorded under "<label>:<name>"
+
+    Returns:
+        List of result dicts (name, status, detail, seconds) in input order,
+        where status is "ok", "skipped" or "failed"
+    """
+    results = asyncio.run(run_async(items, action, workers, label, key, config, journal))
+    if sys.stderr.isatty() and items:
+        print(file=sys.stderr)
+    return results
+
+
+async def run_async(items, action, workers=DEFAULT_WORKERS, label="Working", key=None, config=None, journal=None):
+    """Coroutine behind run, for callers already inside an event loop"""
+    key = key or (lambda item: item["attributes"]["name"])
+    workers = limiter.max_in_flight(workers)
+    done = failed = 0
+
+    async def timed(aclient, item):
+        nonlocal done, failed
+        name = key(item)
+        entry = f"{label}:{name}"
+        async with limit:
+            start = time.monotonic()
+            try:
+                if journal and journal.is_done(entry):
+                    detail = "done in a previous run"
+                else:
+                    detail = await action(aclient, item)
+                    if journal:
+                        journal.record(entry, "ok", detail or "")
+                status = "ok"
+            except Skipped as e:
+                detail = str(e)
+                status = "skipped"
+            except Exception as e:
+                detail = str(e)
+                status = "failed"
+            if journal and status != "ok":
+                journal.record(entry, status, detail)
+            result = {"name": name, "status": status, "detail": detail or "", "seconds": time.monotonic() - start}
+        done += 1
+        failed += status == "failed"
+        progress(label, done, len(items), failed)
+        return result
+
+    async with AsyncTFEClient(config, max_connections=max(1, workers)) as aclient:
+        if items and await aclient.negotiate() == "HTTP/2":
+            workers = min(workers, session.max_streams())
+        limit = asyncio.Semaphore(max(1, workers))
+        return await asyncio.gather(*(timed(aclient, item) for item in items))
+
+
+def progress(label, done, total, failed=0):
+    """Write a single updating progress line to stderr when attached to a terminal"""
+    if not sys.stderr.isatty():
+        return
+    suffix = f", {failed} failed" if failed else ""
+    count = done if total is None else f"{done}/{total}"
+    print(f"\r{label}: {count}{suffix}", end="", file=sys.stderr, flush=True)
+
+
+def print_results(results, elapsed=None, problems_only=False):
+    """Print a per-item result table followed by a summary line
+
+    With problems_only, only skipped and failed items are listed.
+    """
+    if not results:
+        print("No workspaces matched")
+        return
+    rows = [r for r in results if r["status"] != "ok"] if problems_only else results
+    width = max([len("NAME"), *(len(r["name"]) for r in rows)])
+    if rows:
+        print(f"{'NAME':<{width}}  {'STATUS':<7}  {'TIME':>7}  DETAIL")
+    for r in rows:
+        status = r["status"] if r["status"] == "ok" else r["status"].upper()
+        print(f"{r['name']:<{width}}  {status:<7}  {r['seconds']:>6.2f}s  {r['detail']}")
+    counts = {status: sum(r["status"] == status for r in results) for status in ("ok", "skipped", "failed")}
+    summary = f"{counts['ok']} succeeded, {counts['failed']} failed"
+    if counts["skipped"]:
+        summary += f", {counts['skipped']} skipped"
+    if elapsed is not None:
+        stats = limiter.shared().stats()
+        summary += f" in {elapsed:.2f}s (concurrency {stats['limit']}, peak {stats['peak']}, {stats['decreases']} backoff(s))"
+    print(summary)
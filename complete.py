@@ -0,0 +1,106 @@
+"""Shell completion of resource names from the local name cache.
+
+Print a completion script and load it into the current shell:
+
+    eval "$(python complete.py --shell bash)"
+    eval "$(python complete.py --shell zsh)"
+
+The script completes the values of --name, --workspace, --varset,
+--pool-name and similar options of these scripts by running
+"python complete.py -- SCRIPT OPTION PREFIX", which answers from the cache in
+.tfe-cache/ without calling the API. Only name_cache.py is imported, so
+each completion stays fast even for tens of thousands of names.
+"""
+import argparse
+import os
+import shlex
+import sys
+import dotenv
+
+import name_cache
+
+# Resource type whose names complete --name, per script
+NAME_TYPES = {
+    "agent_pools.py": "agent-pools",
+    "policy_sets.py": "policy-sets",
+    "projects.py": "projects",
+    "teams.py": "teams",
+    "varset.py": "varsets",
+    "workspace.py": "workspaces",
+}
+
+# Resource type whose names complete an option in every script
+OPTION_TYPES = {
+    "--policy-set-name": "policy-sets",
+    "--pool-name": "agent-pools",
+    "--project": "projects",
+    "--project-name": "projects",
+    "--varset": "varsets",
+    "--workspace": "workspaces",
+}
+
+# Most candidates returned, so an empty prefix does not print a whole organization
+LIMIT = 500
+
+BASH_SCRIPT = """_tfe_python_complete() {
+    local script=${COMP_WORDS[1]##*/} prev=${COMP_WORDS[COMP_CWORD-1]} cur=${COMP_WORDS[COMP_CWORD]}
+    COMPREPLY=()
+    [[ $COMP_CWORD -ge 2 && $prev == --* ]] || return
+    local IFS=$'\\n'
+    COMPREPLY=($(%(python)s %(complete)s -- "$script" "$prev" "$cur" 2>/dev/null))
+}
+complete -o default -F _tfe_python_complete python python3
+"""
+
+ZSH_PREAMBLE = "autoload -U +X bashcompinit && bashcompinit\n"
+
+
+def candidates(names, prefix, limit=LIMIT):
+    """Names starting with prefix, then names containing it, ignoring case"""
+    needle = prefix.lower()
+    starts = [name for name in names if name.lower().startswith(needle)]
+    if len(starts) >= limit:
+        return starts[:limit]
+    contains = [name for name in names if needle in name.lower() and not name.lower().startswith(needle)]
+    return (starts + contains)[:limit]
+
+
+def complete(script, option, prefix):
+    """Print the cached names completing option of script, one per line"""
+    resource_type = NAME_TYPES.get(script) if option == "--name" else OPTION_TYPES.get(option)
+    if not resource_type:
+        return
+    cached = name_cache.read_names(org, resource_type)
+    try:
+        built = os.path.getmtime(name_cache.cache_path(org))
+    except OSError:
+        built = None
+    if built is None or name_cache.is_stale(built):
+        name_cache.refresh_in_background(org)
+    for name in candidates(cached or [], prefix):
+        # Shell-quote names, e.g. "Default Project" or "it's", so they complete as one safe word
+        print(shlex.quote(name))
+
+
+def shell_script(shell):
+    script = BASH_SCRIPT % {"python": shlex.quote(sys.executable), "complete": shlex.quote(os.path.abspath(__file__))}
+    return ZSH_PREAMBLE + script if shell == "zsh" else script
+
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+
+    org = os.getenv("TFE_ORGANIZATION")
+
+    parser = argparse.ArgumentParser(description="Complete resource names from the local name cache")
+    parser.add_argument("--shell", type=str, choices=["bash", "zsh"], help="Print the completion script for this shell")
+    parser.add_argument("words", nargs="*", help="SCRIPT OPTION PREFIX, as passed by the completion script")
+
+    args = parser.parse_args()
+
+    if args.shell:
+        print(shell_script(args.shell))
+    elif len(args.words) in (2, 3):
+        complete(*args.words, *([""] if len(args.words) == 2 else []))
+    else:
+        parser.print_help()
@@ -0,0 +1,88 @@
+"""Hedged requests to cut tail latency on idempotent GETs.
+
+If a GET has not returned by the p95 of recently observed latencies, a
+duplicate is sent and whichever finishes first wins; the other is cancelled.
+Duplicates are capped at a fraction of all hedgeable requests so a slow
+server is not hit with twice the load.
+"""
+import asyncio
+import os
+from collections import deque
+
+DEFAULT_BUDGET = 0.05
+# Latency samples needed before the p95 is trusted
+MIN_SAMPLES = 20
+
+
+class Hedger:
+    """Issue a backup call when the primary is slower than the observed p95
+
+    Args:
+        budget: Maximum duplicates as a fraction of primary calls
+        window: Number of recent latencies the p95 is taken from
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET, window=500):
+        self.budget = budget
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.wins = 0
+
+    def delay(self):
+        """Seconds to wait before hedging, or None until enough samples exist"""
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def run(self, call):
+        """Await call(), hedging it with a second call() if it is slow"""
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+        try:
+            delay = self.delay()
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                # Check the budget only now, when the duplicate is actually sent
+                if not done and self.hedged < self.budget * self.calls:
+                    self.hedged += 1
+                    backup = asyncio.ensure_future(call())
+                    tasks.append(backup)
+                    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    winner = done.pop()
+                    if winner.exception() is not None and pending:
+                        # Prefer the other attempt over a failure
+                        winner = pending.pop()
+                        await asyncio.wait({winner})
+                    if winner is backup:
+                        self.wins += 1
+                    self.latencies.append(loop.time() - start)
+                    return winner.result()
+            result = await primary
+            self.latencies.append(loop.time() - start)
+            return result
+        finally:
+            # Cancel the losing attempt, or both if we were cancelled ourselves
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self):
+        delay = self.delay()
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "wins": self.wins,
+            "p95_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
+
+
+def from_env():
+    """Return a Hedger if TFE_HEDGE is enabled, with budget TFE_HEDGE_BUDGET"""
+    if os.getenv("TFE_HEDGE", "").lower() not in ("1", "true", "yes"):
+        return None
+    return Hedger(budget=float(os.getenv("TFE_HEDGE_BUDGET", DEFAULT_BUDGET)))
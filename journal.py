@@ -0,0 +1,108 @@
+"""Append-only journal so interrupted bulk commands can resume.
+
+Bulk commands write one JSON line per finished operation and per resolved
+lookup (matched workspaces, project IDs, created workspace IDs) to
+.tfe-journal/<command>-<hash>.jsonl, where the hash covers the command's
+arguments. Re-running the same command with --resume skips the operations
+the journal marks as done and reuses the recorded lookups instead of
+listing everything again. Without --resume the journal starts empty.
+"""
+import hashlib
+import json
+import os
+
+DEFAULT_DIR = ".tfe-journal"
+
+
+class Journal:
+    """Completed operations and resolved lookups of one bulk command
+
+    Args:
+        path: Journal file
+        resume: Load the existing journal instead of starting a new one
+        dry_run: Read the journal but never write to it
+    """
+
+    def __init__(self, path, resume=False, dry_run=False):
+        self.path = path
+        self.done = set()
+        self.lookups = {}
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A crash can leave a torn final line
+                        continue
+                    if entry.get("op") == "lookup":
+                        self.lookups[entry["key"]] = entry["value"]
+                    elif entry.get("status") == "ok":
+                        self.done.add(entry["key"])
+        self._file = None
+        if not dry_run:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "a" if resume else "w")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write(self, entry):
+        if self._file:
+            self._file.write(json.dumps(entry) + "\n")
+            # Flush every line so a killed process loses at most the operation in flight
+            self._file.flush()
+
+    def is_done(self, key):
+        return key in self.done
+
+    def record(self, key, status, detail=""):
+        """Record the outcome of an operation; only "ok" marks it done"""
+        self._write({"op": "result", "key": key, "status": status, "detail": detail})
+        if status == "ok":
+            self.done.add(key)
+
+    def remember(self, key, value):
+        """Record a resolved lookup, e.g. the ID of a created workspace"""
+        self.lookups[key] = value
+        self._write({"op": "lookup", "key": key, "value": value})
+
+    def lookup(self, key, resolve):
+        """Return a recorded lookup, or call resolve() and record its result
+
+        A None result (nothing found) is not recorded, so a rerun looks again.
+        """
+        if key in self.lookups:
+            return self.lookups[key]
+        value = resolve()
+        if value is not None:
+            self.remember(key, value)
+        return value
+
+
+def open_journal(command, arguments, resume=False, dry_run=False):
+    """Open the journal for a command and the arguments that identify the run
+
+    The directory defaults to .tfe-journal and can be set with TFE_JOURNAL_DIR.
+    """
+    digest = hashlib.sha1(json.dumps(arguments, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    directory = os.getenv("TFE_JOURNAL_DIR", DEFAULT_DIR)
+    return Journal(os.path.join(directory, f"{command}-{digest}.jsonl"), resume=resume, dry_run=dry_run)
+
+
+def open_state(name, dry_run=False):
+    """Open a journal that carries over between runs, e.g. the workspaces a lock command locked
+
+    Unlike open_journal, it is always loaded and appended to, and its path
+    depends only on name: <TFE_JOURNAL_DIR>/<name>.jsonl.
+    """
+    directory = os.getenv("TFE_JOURNAL_DIR", DEFAULT_DIR)
+    return Journal(os.path.join(directory, f"{name}.jsonl"), resume=True, dry_run=dry_run)
@@ -0,0 +1,115 @@
+"""Raw JSON:API helpers shared by the CLI scripts.
+
+The pytfe list methods always download full resource attributes and, for some
+resources (variable sets, policy sets), only the first page. These helpers talk
+to the API directly so lookups can ask for just the fields they compare.
+"""
+
+# Largest page size the TFE API accepts
+PAGE_SIZE = 100
+
+
+def sparse_fields(resource_type, *fields):
+    """Build a JSON:API sparse fieldset parameter, e.g. fields[projects]=name"""
+    return {f"fields[{resource_type}]": ",".join(fields)}
+
+
+def paginate(http, path, params=None, page_size=PAGE_SIZE, included=None):
+    """Yield every resource object from a paginated JSON:API collection
+
+    Args:
+        http: Transport with a request(method, path, params=...) method
+        path: Collection path, e.g. /api/v2/organizations/{org}/projects
+        params: Extra query parameters (filters, fields, include)
+        page_size: Number of items requested per page
+        included: Optional dict collecting side-loaded resources by (type, id)
+    """
+    page = 1
+    while True:
+        query = dict(params or {})
+        query["page[number]"] = page
+        query["page[size]"] = page_size
+        document = http.request("GET", path, params=query).json() or {}
+        data = document.get("data", [])
+        if included is not None:
+            included.update(index_included(document))
+        yield from data
+
+        pagination = document.get("meta", {}).get("pagination", {})
+        next_page = pagination.get("next-page")
+        if next_page:
+            page = next_page
+        elif pagination or len(data) < page_size:
+            break
+        else:
+            page += 1
+
+
+def get(http, path, params=None):
+    """Fetch a single resource, returning it with its side-loaded resources
+
+    Returns:
+        Tuple of (resource object, included resources indexed by (type, id))
+    """
+    document = http.request("GET", path, params=params).json() or {}
+    return document.get("data"), index_included(document)
+
+
+def index_included(document):
+    """Index a document's included array by (type, id)"""
+    return {(resource["type"], resource["id"]): resource for resource in document.get("included", [])}
+
+
+def relationship_data(resource_type, ids):
+    """Build a to-many relationship payload, e.g. for /relationships/workspaces"""
+    return {"data": [{"type": resource_type, "id": resource_id} for resource_id in ids]}
+
+
+def related_id(resource, name):
+    """Return the ID a to-one relationship points at, or None"""
+    return (resource.get("relationships", {}).get(name, {}).get("data") or {}).get("id")
+
+
+def related(resource, name, included):
+    """Return the side-loaded resource a to-one relationship points at, or None"""
+    ref = resource.get("relationships", {}).get(name, {}).get("data")
+    if not ref:
+        return None
+    return included.get((ref["type"], ref["id"]))
+
+
+def related_all(resource, name, included):
+    """Return the side-loaded resources a to-many relationship points at
+
+    References missing from included (e.g. not side-loaded) are skipped.
+    """
+    refs = resource.get("relationships", {}).get(name, {}).get("data") or []
+    return [included[(ref["type"], ref["id"])] for ref in refs if (ref["type"], ref["id"]) in included]
+
+
+def find_by_name(http, path, resource_type, name, fields=("name",), params=None, included=None):
+    """Return the first resource whose name attribute matches exactly, or None
+
+    Args:
+        http: Transport with a request(method, path, params=...) method
+        path: Collection path to scan
+        resource_type: JSON:API type used for the sparse fieldset
+        name: Exact name to match
+        fields: Attributes to fetch; "name" is always requested
+        params: Extra query parameters, typically a server-side name filter
+        included: Optional dict collecting side-loaded resources by (type, id)
+    """
+    if "name" not in fields:
+        fields = ("name", *fields)
+    query = dict(params or {})
+    query.update(sparse_fields(resource_type, *fields))
+    for item in paginate(http, path, params=query, included=included):
+        if item.get("attributes", {}).get("name") == name:
+            return item
+    return None
+
+
+def find_id(http, path, resource_type, name, params=None):
+    """Return the ID of the resource with the given name, or None"""
+    item = find_by_name(http, path, resource_type, name, params=params)
+    return item["id"] if item else None
@@ -0,0 +1,123 @@
+"""Adaptive (AIMD) concurrency limit for requests to the TFE API.
+
+The limit grows by one request per round of successful responses while
+latency stays stable, and is halved on 429/5xx responses or when recent
+latency spikes well above its long-run average. One limiter per host is
+shared by every async client in the process, so consecutive bulk phases
+start from the rate the previous phase found instead of relearning it.
+"""
+import asyncio
+import os
+import time
+from urllib.parse import urlparse
+
+DEFAULT_INITIAL = 4
+DEFAULT_MAXIMUM = 64
+# Latency samples needed before spikes count, so connection setup is not one
+WARMUP_SAMPLES = 10
+
+# Statuses that mean the server wants us to slow down
+OVERLOAD_STATUSES = {429, 502, 503, 504}
+
+
+class AdaptiveLimiter:
+    """Additive-increase, multiplicative-decrease limit on in-flight requests
+
+    Args:
+        initial: Starting limit
+        minimum: Lowest the limit can shrink to
+        maximum: Highest the limit can grow to
+        backoff: Factor the limit is multiplied by on overload
+        tolerance: How far the short-term latency average may exceed the
+            long-term one before it counts as a spike
+    """
+
+    def __init__(self, initial=DEFAULT_INITIAL, minimum=1, maximum=DEFAULT_MAXIMUM, backoff=0.5, tolerance=2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.peak = self.limit
+        self.decreases = 0
+        self._samples = 0
+        self._fast = None
+        self._slow = None
+        self._last_decrease = 0.0
+        self._loop = None
+        self._condition = None
+
+    def _ready(self):
+        # asyncio primitives are bound to one event loop, but the limit itself
+        # carries over between asyncio.run calls
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self.in_flight = 0
+        return self._condition
+
+    async def acquire(self):
+        condition = self._ready()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency=None, overloaded=False):
+        """Free a slot and adjust the limit from the request's outcome"""
+        condition = self._ready()
+        async with condition:
+            self.in_flight -= 1
+            if overloaded or self._spiking(latency):
+                self._decrease()
+            elif latency is not None:
+                # Additive increase: about +1 once a full window of requests succeeds
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.peak = max(self.peak, self.limit)
+            condition.notify_all()
+
+    def _spiking(self, latency):
+        if latency is None:
+            return False
+        self._samples += 1
+        if self._fast is None:
+            self._fast = self._slow = latency
+            return False
+        self._fast = 0.5 * self._fast + 0.5 * latency
+        self._slow = 0.95 * self._slow + 0.05 * latency
+        return self._samples > WARMUP_SAMPLES and self._fast > self.tolerance * self._slow
+
+    def _decrease(self):
+        now = time.monotonic()
+        # Requests already in flight report the same overload; back off once per round trip
+        if now - self._last_decrease < (self._fast or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self.decreases += 1
+
+    def stats(self):
+        return {"limit": int(self.limit), "peak": int(self.peak), "decreases": self.decreases}
+
+
+# Limiters by host
+_shared = {}
+
+
+def max_in_flight(maximum=None):
+    """Ceiling on in-flight requests, falling back to TFE_MAX_IN_FLIGHT (default 64)"""
+    return maximum or int(os.getenv("TFE_MAX_IN_FLIGHT", DEFAULT_MAXIMUM))
+
+
+def shared(address=None):
+    """Return the process-wide limiter for a host, created on first use
+
+    Each host adapts its own limit, so an overloaded instance does not slow
+    requests to another one. address defaults to TFE_ADDRESS, and the
+    ceiling comes from max_in_flight().
+    """
+    host = urlparse(address or os.getenv("TFE_ADDRESS", "https://app.terraform.io")).netloc
+    if host not in _shared:
+        _shared[host] = AdaptiveLimiter(maximum=max_in_flight())
+    return _shared[host]
@@ -0,0 +1,99 @@
+"""On-disk cache of resource names, shared by names.py and complete.py.
+
+The cache lives in .tfe-cache/ (or TFE_CACHE_DIR): a JSON file with every
+(resource type, name, ID) entry of an organization, plus one plain text file
+of names per resource type that shell completion reads directly. A cache
+older than TFE_CACHE_TTL seconds is still used, but triggers a refresh in a
+background process. This module avoids asyncio and HTTP imports so
+completion, which only reads the cache, starts quickly.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+DEFAULT_DIR = ".tfe-cache"
+DEFAULT_TTL = 900
+# A refresh still holding its lock after this many seconds is assumed dead
+REFRESH_TIMEOUT = 300
+
+
+def cache_path(org, suffix="json"):
+    """Cache file for an organization on the host in TFE_ADDRESS"""
+    host = urlparse(os.getenv("TFE_ADDRESS", "https://app.terraform.io")).netloc or "default"
+    directory = os.getenv("TFE_CACHE_DIR", DEFAULT_DIR)
+    return os.path.join(directory, f"names-{host.replace(':', '_')}-{org}.{suffix}")
+
+
+def read(org):
+    """Return the cached {"built", "entries", ...index} of an organization, or None"""
+    try:
+        with open(cache_path(org)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_names(org, resource_type):
+    """Return the cached names of one resource type, or None"""
+    try:
+        with open(cache_path(org, f"{resource_type}.txt")) as f:
+            return f.read().splitlines()
+    except OSError:
+        return None
+
+
+def _replace(path, content):
+    # Write then rename, so a reader never sees a partial file
+    with open(f"{path}.tmp", "w") as f:
+        f.write(content)
+    os.replace(f"{path}.tmp", path)
+
+
+def write(org, built, entries, resource_types, index=None):
+    """Save the entries and their index, and the names of each resource type for completion"""
+    path = cache_path(org)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    for resource_type in resource_types:
+        names = [name for entry_type, name, _ in entries if entry_type == resource_type]
+        _replace(cache_path(org, f"{resource_type}.txt"), "".join(f"{name}\n" for name in names))
+    _replace(path, json.dumps({"built": built, "entries": entries, **(index or {})}))
+
+
+def is_stale(built):
+    """Whether a cache built at this time is older than TFE_CACHE_TTL (default 900s)"""
+    return time.time() - built > float(os.getenv("TFE_CACHE_TTL", DEFAULT_TTL))
+
+
+def refresh_in_background(org):
+    """Rebuild the cache in a detached process, unless a refresh is already running"""
+    lock = cache_path(org, "lock")
+    try:
+        if time.time() - os.path.getmtime(lock) < REFRESH_TIMEOUT:
+            return
+        os.remove(lock)
+    except FileNotFoundError:
+        pass
+    try:
+        os.makedirs(os.path.dirname(lock) or ".", exist_ok=True)
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return
+    subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "names.py")],
+        env={**os.environ, "TFE_ORGANIZATION": org},
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def release(org):
+    """Remove the lock taken by refresh_in_background"""
+    try:
+        os.remove(cache_path(org, "lock"))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,248 @@
+"""Local name index for finding resources and suggesting near misses.
+
+One concurrent inventory pass lists the names of every project, workspace,
+variable set, team, policy set and agent pool in an organization and saves
+them with name_cache.py, together with the trigram postings of the names.
+Queries answer from the saved index without calling the API, so a missed
+--name lookup can print "did you mean" suggestions. Run directly, this module
+rebuilds the cache of TFE_ORGANIZATION.
+"""
+import asyncio
+import base64
+import bisect
+import heapq
+import itertools
+import math
+import os
+import time
+from array import array
+from collections import Counter
+import dotenv
+
+import jsonapi
+import name_cache
+from async_client import AsyncTFEClient
+
+# Indexed JSON:API resource types and their display names
+RESOURCE_TYPES = {
+    "projects": "project",
+    "workspaces": "workspace",
+    "varsets": "variable set",
+    "teams": "team",
+    "policy-sets": "policy set",
+    "agent-pools": "agent pool",
+}
+
+# Lowest trigram similarity a fuzzy match needs
+CUTOFF = 0.3
+# Most posting entries a fuzzy query counts, and most names it scores
+POSTINGS_BUDGET = 1000
+SCORED = 32
+# Fewest postings a fuzzy query counts, even past the budget
+MIN_COUNTED = 3
+
+
+def trigrams(text):
+    """Trigrams of text, lowercased and padded so short names and prefixes still match"""
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Substring and trigram index over (resource type, name, ID) entries
+
+    Entries are kept grouped by resource type, shortest name first, so each
+    type is one contiguous range and any range of name lengths within it is
+    found by bisection. Substring queries scan the lowercased names of a type
+    joined into one string, so the first matches found are the shortest.
+    Fuzzy queries count the postings of the query's rarest trigrams, cut to
+    the wanted types and plausible lengths and bounded by POSTINGS_BUDGET,
+    and score only the SCORED names sharing the most.
+
+    Args:
+        entries: List of (resource type, name, ID) tuples
+        built: Time the entries were listed, in seconds since the epoch
+        postings: Saved postings from to_cache() for entries in the same
+            order; computed (slowly, for large organizations) when omitted
+    """
+
+    def __init__(self, entries, built=None, postings=None):
+        if postings is None:
+            order = {resource_type: n for n, resource_type in enumerate(RESOURCE_TYPES)}
+            entries = sorted(entries, key=lambda entry: (order.get(entry[0], len(order)), entry[0], len(entry[1]), entry[1].lower()))
+        self.entries = entries
+        self.built = built or time.time()
+        self._lowered = [name.lower() for _, name, _ in entries]
+        self._lengths = [len(name) for name in self._lowered]
+        self._ranges = {}
+        for i, (resource_type, _, _) in enumerate(entries):
+            self._ranges[resource_type] = (self._ranges.get(resource_type, (i,))[0], i + 1)
+        # Joined names of each resource type and the offset of each name
+        self._joined = {}
+        if postings is None:
+            lists = {}
+            for i, name in enumerate(self._lowered):
+                for gram in trigrams(name):
+                    lists.setdefault(gram, []).append(i)
+            self._postings = array("I", itertools.chain.from_iterable(lists.values()))
+            bounds = [0, *itertools.accumulate(len(ids) for ids in lists.values())]
+            self._grams = {gram: (bounds[n], bounds[n + 1]) for n, gram in enumerate(lists)}
+        else:
+            self._postings = array("I", base64.b64decode(postings["postings"]))
+            self._grams = postings["grams"]
+
+    def to_cache(self):
+        """The postings, as saved alongside the entries by name_cache.write"""
+        return {"grams": self._grams, "postings": base64.b64encode(self._postings.tobytes()).decode()}
+
+    def _find(self, needle, resource_type, limit):
+        # Indexes of the first names of a type containing needle, shortest first
+        start, end = self._ranges[resource_type]
+        if resource_type not in self._joined:
+            joined = "".join(f"{name}\n" for name in self._lowered[start:end])
+            offsets = [*itertools.accumulate((length + 1 for length in self._lengths[start:end]), initial=0)]
+            self._joined[resource_type] = (joined, offsets)
+        joined, offsets = self._joined[resource_type]
+        found = []
+        position = joined.find(needle)
+        while position != -1 and len(found) < limit:
+            n = bisect.bisect_right(offsets, position) - 1
+            found.append(start + n)
+            position = joined.find(needle, offsets[n + 1])
+        return found
+
+    def search(self, text, resource_type=None, limit=20, cutoff=CUTOFF):
+        """Entries whose name contains text or, if none does, entries with similar names
+
+        Returns:
+            List of (resource type, name, ID, score) tuples, best first, where
+            score is 1.0 for substring matches and the trigram similarity
+            otherwise; empty for a blank text
+        """
+        needle = text.lower()
+        if not needle.strip():
+            return []
+        if resource_type and resource_type not in self._ranges:
+            return []
+        ranges = {resource_type: self._ranges[resource_type]} if resource_type else self._ranges
+
+        # A name containing the needle has all of its unpadded trigrams
+        if all(gram in self._grams for gram in (needle[i:i + 3] for i in range(len(needle) - 2))):
+            found = [i for resource_type in ranges for i in self._find(needle, resource_type, limit)]
+            if found:
+                found = sorted(found, key=lambda i: (self._lengths[i], self._lowered[i]))[:limit]
+                return [(*self.entries[i], 1.0) for i in found]
+
+        # Names at least cutoff similar share enough trigrams that they must
+        # contain one of the needle's rarest ones, and have about as many
+        # trigrams as it (one per character plus one), so only those postings
+        # are counted, within the wanted types and lengths
+        grams = trigrams(needle)
+        overlap = math.ceil(cutoff * len(grams))
+        shortest = overlap - 1
+        longest = math.floor(len(grams) / cutoff) - 1
+        windows = [
+            (bisect.bisect_left(self._lengths, shortest, start, end), bisect.bisect_right(self._lengths, longest, start, end))
+            for start, end in ranges.values()
+        ]
+        bounds = sorted((self._grams[gram] for gram in grams if gram in self._grams), key=lambda bound: bound[1] - bound[0])
+        counts = Counter()
+        counted = 0
+        for n, (start, end) in enumerate(bounds[:len(grams) - overlap + 1]):
+            slices = [
+                self._postings[bisect.bisect_left(self._postings, low, start, end):bisect.bisect_left(self._postings, high, start, end)]
+                for low, high in windows
+            ]
+            size = sum(map(len, slices))
+            # A single posting gives every name the same count, too few to rank them
+            if n >= MIN_COUNTED and counted + size > POSTINGS_BUDGET:
+                break
+            for posting in slices:
+                counts.update(posting)
+            counted += size
+        scored = []
+        for i, _ in counts.most_common(SCORED):
+            # Testing the padded name directly is cheaper than building its trigram set
+            padded = f"  {self._lowered[i]} "
+            shared = sum(map(padded.__contains__, grams))
+            similarity = shared / (len(grams) + len(padded) - 2 - shared)
+            if similarity >= cutoff:
+                scored.append((similarity, -i))
+        return [(*self.entries[-i], similarity) for similarity, i in heapq.nlargest(limit, scored)]
+
+    def suggest(self, resource_type, name, limit=3):
+        """Names of the given type containing or resembling name"""
+        # A looser cutoff than search, since any close name beats none
+        return [match[1] for match in self.search(name, resource_type, limit, cutoff=0.2)]
+
+
+async def inventory(org, config=None):
+    """List the names of every indexed resource type concurrently"""
+    async with AsyncTFEClient(config) as aclient:
+
+        async def listing(resource_type):
+            items = await aclient.fetch_all(
+                f"/api/v2/organizations/{org}/{resource_type}",
+                params=jsonapi.sparse_fields(resource_type, "name"),
+            )
+            return [(resource_type, item["attributes"]["name"], item["id"]) for item in items]
+
+        listings = await asyncio.gather(*(listing(resource_type) for resource_type in RESOURCE_TYPES))
+    return [entry for listing in listings for entry in listing]
+
+
+def build(org, config=None):
+    """List every name in the organization, save the cache and return its index"""
+    built = time.time()
+    index = NameIndex(asyncio.run(inventory(org, config)), built)
+    name_cache.write(org, built, index.entries, RESOURCE_TYPES, index.to_cache())
+    return index
+
+
+def cached(org):
+    """Return the organization's index from the cache, or None if there is none
+
+    A stale cache is still used, and refreshed in the background.
+    """
+    saved = name_cache.read(org)
+    if saved is None or "postings" not in saved:
+        return None
+    if name_cache.is_stale(saved["built"]):
+        name_cache.refresh_in_background(org)
+    return NameIndex([tuple(entry) for entry in saved["entries"]], saved["built"], saved)
+
+
+def load(org, refresh=False):
+    """Return the organization's index from the cache, building it if missing"""
+    return (None if refresh else cached(org)) or build(org)
+
+
+def did_you_mean(org, resource_type, name):
+    """Suffix for a "not found" message listing similar names, or ""
+
+    Only the cache is used: without one, a background refresh is started so
+    later errors get suggestions. Never raises, so a failure to read the
+    index does not hide the original error.
+    """
+    try:
+        index = cached(org)
+        if index is None:
+            name_cache.refresh_in_background(org)
+            return ""
+        suggestions = index.suggest(resource_type, name)
+    except Exception:
+        return ""
+    if not suggestions:
+        return ""
+    return f". Did you mean: {', '.join(repr(suggestion) for suggestion in suggestions)}?"
+
+
+if __name__ == "__main__":
+    # Started by name_cache.refresh_in_background
+    dotenv.load_dotenv()
+
+    org = os.getenv("TFE_ORGANIZATION")
+    try:
+        build(org)
+    finally:
+        name_cache.release(org)
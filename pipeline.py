@@ -0,0 +1,92 @@
+"""Streaming read -> transform -> write pipeline with bounded queues.
+
+Items flow from an async source through a transform coroutine into a pool of
+writer coroutines. Queues between the stages are bounded, so a fast reader
+waits for the writers instead of loading a whole organization into memory,
+and writing starts as soon as the first page has been read.
+"""
+import asyncio
+import sys
+import time
+
+import bulk
+import limiter
+
+QUEUE_SIZE = 200
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+async def stream(source, transform, write, key, workers=bulk.DEFAULT_WORKERS, queue_size=QUEUE_SIZE, label="Working", journal=None):
+    """Run items from source through transform and write concurrently
+
+    Args:
+        source: Async iterable of input items
+        transform: Coroutine function turning an item into a write payload;
+            may raise bulk.Skipped
+        write: Coroutine function taking (item, payload); its return value
+            becomes the detail
+        key: Callable returning the display name of an item
+        workers: Number of concurrent writers
+        queue_size: Capacity of each queue between stages
+        label: Progress line prefix, also namespaces journal entries
+        journal: Optional Journal; items it marks done are not transformed
+            or written again
+
+    Returns:
+        List of result dicts (name, status, detail, seconds) in completion order
+    """
+    read_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+    results = []
+    workers = max(1, limiter.max_in_flight(workers))
+
+    def finish(name, status, detail, start):
+        results.append({"name": name, "status": status, "detail": detail or "", "seconds": time.monotonic() - start})
+        if journal:
+            journal.record(f"{label}:{name}", status, detail or "")
+        bulk.progress(label, len(results), None, sum(r["status"] == "failed" for r in results))
+
+    async def reader():
+        async for item in source:
+            await read_queue.put(item)
+        await read_queue.put(_DONE)
+
+    async def transformer():
+        while (item := await read_queue.get()) is not _DONE:
+            name = key(item)
+            start = time.monotonic()
+            if journal and journal.is_done(f"{label}:{name}"):
+                results.append({"name": name, "status": "ok", "detail": "done in a previous run", "seconds": 0.0})
+                continue
+            try:
+                payload = await transform(item)
+            except bulk.Skipped as e:
+                finish(name, "skipped", str(e), start)
+                continue
+            except Exception as e:
+                finish(name, "failed", str(e), start)
+                continue
+            await write_queue.put((item, payload, start))
+        for _ in range(workers):
+            await write_queue.put(_DONE)
+
+    async def writer():
+        while (entry := await write_queue.get()) is not _DONE:
+            item, payload, start = entry
+            try:
+                detail = await write(item, payload)
+                status = "ok"
+            except bulk.Skipped as e:
+                detail = str(e)
+                status = "skipped"
+            except Exception as e:
+                detail = str(e)
+                status = "failed"
+            finish(key(item), status, detail, start)
+
+    await asyncio.gather(reader(), transformer(), *(writer() for _ in range(workers)))
+    if sys.stderr.isatty() and results:
+        print(file=sys.stderr)
+    return results
@@ -2,10 +2,11 @@ import argparse
 import os
 import dotenv
 
-from pytfe import TFEClient, TFEConfig
+import jsonapi
+import names
+import session
 from pytfe.models import (
     PolicySetCreateOptions,
-    PolicySetListOptions,
     PolicySetUpdateOptions,
     PolicySetAddPoliciesOptions,
     PolicySetAddWorkspacesOptions,
@@ -31,51 +32,101 @@ def create(name, description=None, is_global=False):
     except Exception as e:
         print(f"Error creating policy set: {e}")
 
+def find_policy_set_id(name):
+    """Find a policy set ID by exact name, fetching only the name field"""
+    return jsonapi.find_id(
+        http,
+        f"/api/v2/organizations/{org}/policy-sets",
+        "policy-sets",
+        name,
+        params={"search[name]": name},
+    )
+
+# Policy set fields shown by read, including the relationships it side-loads
+READ_FIELDS = (
+    "name",
+    "description",
+    "kind",
+    "global",
+    "policy-count",
+    "workspace-count",
+    "project-count",
+    "created-at",
+    "policies",
+    "workspaces",
+    "projects",
+)
+READ_PARAMS = {
+    "include": "policies,workspaces,projects",
+    **jsonapi.sparse_fields("policies", "name", "kind"),
+    **jsonapi.sparse_fields("workspaces", "name"),
+    **jsonapi.sparse_fields("projects", "name"),
+}
+
 def read(name=None, policy_set_id=None):
-    """Read policy set details by name or ID"""
+    """Read policy set details by name or ID, with its policies, workspaces and projects in the same request"""
     try:
-        # If name is provided, list and find it
+        included = {}
         if name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{name}' not found")
+            policy_set = jsonapi.find_by_name(
+                http,
+                f"/api/v2/organizations/{org}/policy-sets",
+                "policy-sets",
+                name,
+                fields=READ_FIELDS,
+                params={"search[name]": name, **READ_PARAMS},
+                included=included,
+            )
+            if not policy_set:
+                print(f"Policy set '{name}' not found{names.did_you_mean(org, 'policy-sets', name)}")
                 return
-        
-        if not policy_set_id:
+        elif policy_set_id:
+            policy_set, included = jsonapi.get(
+                http,
+                f"/api/v2/policy-sets/{policy_set_id}",
+                params={**jsonapi.sparse_fields("policy-sets", *READ_FIELDS), **READ_PARAMS},
+            )
+        else:
             print("Please provide either --name or --id")
             return
         
-        policy_set = client.policy_sets.read(policy_set_id)
-        
-        print(f"Policy Set: {policy_set.name}")
-        print(f"ID: {policy_set.id}")
-        if policy_set.description:
-            print(f"Description: {policy_set.description}")
-        print(f"Policies Count: {policy_set.policy_count if hasattr(policy_set, 'policy_count') else 'N/A'}")
-        print(f"Workspaces Count: {policy_set.workspace_count if hasattr(policy_set, 'workspace_count') else 'N/A'}")
-        print(f"Created At: {policy_set.created_at}")
+        attrs = policy_set["attributes"]
+        print(f"Policy Set: {attrs['name']}")
+        print(f"ID: {policy_set['id']}")
+        if attrs.get("description"):
+            print(f"Description: {attrs['description']}")
+        print(f"Kind: {attrs.get('kind', 'N/A')}")
+        print(f"Global: {attrs.get('global', 'N/A')}")
+        print(f"Policies Count: {attrs.get('policy-count', 'N/A')}")
+        print(f"Workspaces Count: {attrs.get('workspace-count', 'N/A')}")
+        print(f"Created At: {attrs.get('created-at')}")
+        for relationship, label in (("policies", "Policies"), ("workspaces", "Workspaces"), ("projects", "Projects")):
+            resources = jsonapi.related_all(policy_set, relationship, included)
+            if resources:
+                print(f"{label}:")
+                for resource in resources:
+                    print(f"  - {resource['attributes'].get('name')} (ID: {resource['id']})")
     except Exception as e:
         print(f"Error reading policy set: {e}")
 
 def list():
     """List all policy sets in the organization"""
     try:
-        result = client.policy_sets.list(org, PolicySetListOptions())
-        policy_sets = result.items if hasattr(result, 'items') else result
+        policy_sets = [*jsonapi.paginate(
+            http,
+            f"/api/v2/organizations/{org}/policy-sets",
+            params=jsonapi.sparse_fields("policy-sets", "name", "policy-count", "workspace-count"),
+        )]
         
         if not policy_sets:
             print("No policy sets found")
             return
         
         for ps in policy_sets:
-            policy_count = ps.policy_count if hasattr(ps, 'policy_count') else 'N/A'
-            ws_count = ps.workspace_count if hasattr(ps, 'workspace_count') else 'N/A'
-            print(f"- {ps.name} (ID: {ps.id}, Policies: {policy_count}, Workspaces: {ws_count})")
+            attrs = ps["attributes"]
+            policy_count = attrs.get("policy-count", "N/A")
+            ws_count = attrs.get("workspace-count", "N/A")
+            print(f"- {attrs['name']} (ID: {ps['id']}, Policies: {policy_count}, Workspaces: {ws_count})")
     except Exception as e:
         print(f"Error listing policy sets: {e}")
 
@@ -84,14 +135,9 @@ def update(name=None, policy_set_id=None, new_name=None, description=None):
     try:
         # If name is provided, find the policy set ID
         if name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{name}' not found")
+            policy_set_id = find_policy_set_id(name)
+            if not policy_set_id:
+                print(f"Policy set '{name}' not found{names.did_you_mean(org, 'policy-sets', name)}")
                 return
         
         if not policy_set_id:
@@ -114,14 +160,9 @@ def delete(name=None, policy_set_id=None):
     try:
         # If name is provided, find the policy set ID
         if name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{name}' not found")
+            policy_set_id = find_policy_set_id(name)
+            if not policy_set_id:
+                print(f"Policy set '{name}' not found{names.did_you_mean(org, 'policy-sets', name)}")
                 return
         
         if not policy_set_id:
@@ -138,14 +179,9 @@ def add_policies(policy_set_name=None, policy_set_id=None, policy_ids=None):
     try:
         # If name is provided, find the policy set ID
         if policy_set_name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == policy_set_name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{policy_set_name}' not found")
+            policy_set_id = find_policy_set_id(policy_set_name)
+            if not policy_set_id:
+                print(f"Policy set '{policy_set_name}' not found{names.did_you_mean(org, 'policy-sets', policy_set_name)}")
                 return
         
         if not policy_set_id:
@@ -167,14 +203,9 @@ def remove_policies(policy_set_name=None, policy_set_id=None, policy_ids=None):
     try:
         # If name is provided, find the policy set ID
         if policy_set_name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == policy_set_name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{policy_set_name}' not found")
+            policy_set_id = find_policy_set_id(policy_set_name)
+            if not policy_set_id:
+                print(f"Policy set '{policy_set_name}' not found{names.did_you_mean(org, 'policy-sets', policy_set_name)}")
                 return
         
         if not policy_set_id:
@@ -196,14 +227,9 @@ def add_workspaces(policy_set_name=None, policy_set_id=None, workspace_ids=None)
     try:
         # If name is provided, find the policy set ID
         if policy_set_name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == policy_set_name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{policy_set_name}' not found")
+            policy_set_id = find_policy_set_id(policy_set_name)
+            if not policy_set_id:
+                print(f"Policy set '{policy_set_name}' not found{names.did_you_mean(org, 'policy-sets', policy_set_name)}")
                 return
         
         if not policy_set_id:
@@ -225,14 +251,9 @@ def remove_workspaces(policy_set_name=None, policy_set_id=None, workspace_ids=No
     try:
         # If name is provided, find the policy set ID
         if policy_set_name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == policy_set_name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{policy_set_name}' not found")
+            policy_set_id = find_policy_set_id(policy_set_name)
+            if not policy_set_id:
+                print(f"Policy set '{policy_set_name}' not found{names.did_you_mean(org, 'policy-sets', policy_set_name)}")
                 return
         
         if not policy_set_id:
@@ -254,14 +275,9 @@ def add_projects(policy_set_name=None, policy_set_id=None, project_ids=None):
     try:
         # If name is provided, find the policy set ID
         if policy_set_name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == policy_set_name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{policy_set_name}' not found")
+            policy_set_id = find_policy_set_id(policy_set_name)
+            if not policy_set_id:
+                print(f"Policy set '{policy_set_name}' not found{names.did_you_mean(org, 'policy-sets', policy_set_name)}")
                 return
         
         if not policy_set_id:
@@ -283,14 +299,9 @@ def remove_projects(policy_set_name=None, policy_set_id=None, project_ids=None):
     try:
         # If name is provided, find the policy set ID
         if policy_set_name and not policy_set_id:
-            result = client.policy_sets.list(org, PolicySetListOptions())
-            policy_sets = result.items if hasattr(result, 'items') else result
-            for ps in policy_sets:
-                if ps.name == policy_set_name:
-                    policy_set_id = ps.id
-                    break
-            else:
-                print(f"Policy set '{policy_set_name}' not found")
+            policy_set_id = find_policy_set_id(policy_set_name)
+            if not policy_set_id:
+                print(f"Policy set '{policy_set_name}' not found{names.did_you_mean(org, 'policy-sets', policy_set_name)}")
                 return
         
         if not policy_set_id:
@@ -311,7 +322,9 @@ if __name__ == "__main__":
     dotenv.load_dotenv()
     
     org = os.getenv("TFE_ORGANIZATION")
-    client = TFEClient(TFEConfig())
+    client = session.create_client()
+    # Raw JSON:API calls share the SDK client's connection pool
+    http = client._transport
     
     parser = argparse.ArgumentParser(description="Policy Set management CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -0,0 +1,100 @@
+"""Run read-only commands across several organizations and hosts.
+
+Organizations come from --org (comma-separated, on the host in TFE_ADDRESS)
+and/or --profiles, a YAML file listing organizations with their own host and
+token:
+
+    - org: acme-prod
+      address: https://tfe.example.com
+      token_env: TFE_TOKEN_EXAMPLE   # or token: ...
+    - org: acme-dev                  # TFE_ADDRESS and TFE_TOKEN
+
+A profile on another host than TFE_ADDRESS must set token or token_env, so
+TFE_TOKEN is never sent to a different server.
+
+Organizations sharing a host and token share one connection pool, every host
+has its own adaptive limiter (limiter.shared), and all organizations are
+queried concurrently.
+"""
+import asyncio
+import os
+from urllib.parse import urlparse
+import yaml
+
+import limiter
+from async_client import AsyncTFEClient
+from pytfe import TFEConfig
+
+
+def add_arguments(parser):
+    """Add the --org and --profiles options to a subcommand parser"""
+    parser.add_argument("--org", type=str, help="Comma-separated organizations (defaults to TFE_ORGANIZATION)")
+    parser.add_argument("--profiles", type=str, help="YAML file of organizations, each with optional address and token or token_env")
+
+
+def targets(orgs=None, profiles_path=None):
+    """Return the (org, address, token) targets selected by --org and --profiles
+
+    Without either, the target is TFE_ORGANIZATION on TFE_ADDRESS.
+    """
+    address = os.getenv("TFE_ADDRESS", "https://app.terraform.io").rstrip("/")
+    token = os.getenv("TFE_TOKEN", "")
+    selected = []
+    if profiles_path:
+        with open(profiles_path) as f:
+            for profile in yaml.safe_load(f) or []:
+                if not profile.get("org"):
+                    raise ValueError(f"Profile without an org in {profiles_path}")
+                profile_token = profile.get("token")
+                if not profile_token and profile.get("token_env"):
+                    profile_token = os.getenv(profile["token_env"])
+                    if not profile_token:
+                        raise ValueError(f"Profile '{profile['org']}' in {profiles_path}: {profile['token_env']} is not set")
+                profile_address = (profile.get("address") or address).rstrip("/")
+                if not profile_token:
+                    # TFE_TOKEN is a credential for TFE_ADDRESS only
+                    if profile_address != address:
+                        raise ValueError(f"Profile '{profile['org']}' in {profiles_path}: set token or token_env for {profile_address}")
+                    profile_token = token
+                selected.append((profile["org"], profile_address, profile_token))
+    selected += [(org.strip(), address, token) for org in (orgs or "").split(",") if org.strip()]
+    return selected or [(os.getenv("TFE_ORGANIZATION"), address, token)]
+
+
+def labels(selected):
+    """Display name of each target: the org, prefixed by its host when several hosts are involved"""
+    if len({address for _, address, _ in selected}) > 1:
+        return [f"{urlparse(address).netloc}/{org}" for org, address, _ in selected]
+    return [org for org, _, _ in selected]
+
+
+async def gather(selected, fetch, workers=None):
+    """Await fetch(aclient, org) for every target concurrently
+
+    Args:
+        selected: Targets from targets()
+        fetch: Coroutine function taking (AsyncTFEClient, org)
+        workers: Connection pool size per host and token, defaulting to
+            limiter.max_in_flight()
+
+    Returns:
+        List of fetch results in target order; a target that failed has its
+        exception in place of the result
+    """
+    clients = {}
+    for _, address, token in selected:
+        if (address, token) not in clients:
+            clients[(address, token)] = AsyncTFEClient(TFEConfig(address=address, token=token), max_connections=limiter.max_in_flight(workers))
+    try:
+        return await asyncio.gather(
+            *(fetch(clients[(address, token)], org) for org, address, token in selected),
+            return_exceptions=True,
+        )
+    finally:
+        for aclient in clients.values():
+            await aclient.aclose()
+
+
+def run(selected, fetch, workers=None):
+    """Synchronous wrapper around gather"""
+    return asyncio.run(gather(selected, fetch, workers))
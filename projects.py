@@ -1,14 +1,21 @@
 import argparse
+import asyncio
+import math
 import os
+import time
 import dotenv
 
-from pytfe import TFEClient, TFEConfig
-from pytfe._http import HTTPTransport
+import bulk
+import jsonapi
+import journal
+import limiter
+import names
+import session
+from async_client import AsyncTFEClient
 from pytfe.errors import NotFound
 from pytfe.models import (
     ProjectAddTagBindingsOptions,
     ProjectCreateOptions,
-    ProjectListOptions,
     ProjectUpdateOptions,
     TagBinding,
 )
@@ -25,62 +32,146 @@ def create(name, description):
         print(f"Error creating project: {e}")
     pass
 
+def find_project_id(name):
+    """Find a project ID by exact name, fetching only the name field"""
+    return jsonapi.find_id(
+        http,
+        f"/api/v2/organizations/{org}/projects",
+        "projects",
+        name,
+        params={"filter[names]": name},
+    )
+
 def read(name=None, project_id=None):
     try:
-        # Get all projects
-        projects = client.projects.list(org, ProjectListOptions())
-        
         # Find the matching project
         found_project = None
         if name:
-            for project in projects:
-                if project.name == name:
-                    found_project = project
-                    break
+            found_project = jsonapi.find_by_name(
+                http,
+                f"/api/v2/organizations/{org}/projects",
+                "projects",
+                name,
+                fields=("description", "workspace-count", "created-at"),
+                params={"filter[names]": name},
+            )
         elif project_id:
-            for project in projects:
-                if project.id == project_id:
-                    found_project = project
-                    break
+            found_project = http.request("GET", f"/api/v2/projects/{project_id}").json()["data"]
         else:
             print("Please provide either --name or --id")
             return
         
         # Display the project details
         if found_project:
-            print(f"Project: {found_project.name}")
-            print(f"ID: {found_project.id}")
-            print(f"Description: {found_project.description}")
-            print(f"Organization: {found_project.organization}")
-            print(f"Workspace Count: {found_project.workspace_count}")
-            print(f"Created: {found_project.created_at}")
+            attrs = found_project["attributes"]
+            print(f"Project: {attrs['name']}")
+            print(f"ID: {found_project['id']}")
+            print(f"Description: {attrs.get('description')}")
+            print(f"Organization: {org}")
+            print(f"Workspace Count: {attrs.get('workspace-count')}")
+            print(f"Created: {attrs.get('created-at')}")
         else:
-            identifier = name if name else project_id
-            print(f"Project '{identifier}' not found")
+            if name:
+                print(f"Project '{name}' not found{names.did_you_mean(org, 'projects', name)}")
+            else:
+                print(f"Project '{project_id}' not found")
+    except NotFound:
+        print(f"Project '{project_id}' not found")
     except Exception as e:
         print(f"Error reading project: {e}")
     pass
 
 def list():
     try:
-        projects = client.projects.list(org, ProjectListOptions())
+        projects = jsonapi.paginate(
+            http,
+            f"/api/v2/organizations/{org}/projects",
+            params=jsonapi.sparse_fields("projects", "name", "workspace-count"),
+        )
         for project in projects:
-            print(f"- {project}")
+            attrs = project["attributes"]
+            print(f"- {attrs['name']} (ID: {project['id']}, Workspaces: {attrs.get('workspace-count')})")
     except Exception as e:
         print(f"Error listing projects: {e}")
     pass
 
+async def project_workspaces(aclient, project_id):
+    """List the names of a project's workspaces using the project filter"""
+    workspaces = aclient.workspaces.list(
+        org,
+        params={"filter[project][id]": project_id, **jsonapi.sparse_fields("workspaces", "name")},
+    )
+    return sorted([workspace["attributes"]["name"] async for workspace in workspaces])
+
+async def fan_out_workspaces(projects, workers):
+    """List the workspaces of each project concurrently, in project order"""
+    limit = asyncio.Semaphore(max(1, workers))
+    
+    async def fetch(aclient, project):
+        if not project["attributes"].get("workspace-count"):
+            return []
+        async with limit:
+            return await project_workspaces(aclient, project["id"])
+    
+    async with AsyncTFEClient(max_connections=max(1, workers)) as aclient:
+        return await asyncio.gather(*(fetch(aclient, project) for project in projects))
+
+def tree(name=None, workers=bulk.DEFAULT_WORKERS):
+    """Show projects with their workspaces
+    
+    Workspaces are fetched per project concurrently, or with one org-wide
+    listing grouped locally when that needs fewer request rounds.
+    """
+    try:
+        workers = limiter.max_in_flight(workers)
+        params = jsonapi.sparse_fields("projects", "name", "workspace-count")
+        if name:
+            params["filter[names]"] = name
+        projects = sorted(
+            jsonapi.paginate(http, f"/api/v2/organizations/{org}/projects", params=params),
+            key=lambda project: project["attributes"]["name"],
+        )
+        if name:
+            projects = [project for project in projects if project["attributes"]["name"] == name]
+        if not projects:
+            print(f"Project '{name}' not found{names.did_you_mean(org, 'projects', name)}" if name else "No projects found")
+            return
+        
+        counts = [project["attributes"].get("workspace-count") or 0 for project in projects]
+        per_project_requests = sum(math.ceil(count / jsonapi.PAGE_SIZE) for count in counts)
+        per_project_rounds = math.ceil(per_project_requests / max(1, workers))
+        org_wide_pages = math.ceil(sum(counts) / jsonapi.PAGE_SIZE)
+        
+        if not name and org_wide_pages <= per_project_rounds:
+            grouped = {project["id"]: [] for project in projects}
+            workspaces = jsonapi.paginate(
+                http,
+                f"/api/v2/organizations/{org}/workspaces",
+                params=jsonapi.sparse_fields("workspaces", "name", "project"),
+            )
+            for workspace in workspaces:
+                ref = workspace.get("relationships", {}).get("project", {}).get("data") or {}
+                grouped.setdefault(ref.get("id"), []).append(workspace["attributes"]["name"])
+            workspace_names = [sorted(grouped[project["id"]]) for project in projects]
+        else:
+            workspace_names = asyncio.run(fan_out_workspaces(projects, workers))
+        
+        for project, names_in_project in zip(projects, workspace_names):
+            print(f"{project['attributes']['name']} (ID: {project['id']}, Workspaces: {len(names_in_project)})")
+            for index, workspace_name in enumerate(names_in_project):
+                branch = "└──" if index == len(names_in_project) - 1 else "├──"
+                print(f"  {branch} {workspace_name}")
+        print(f"{len(projects)} project(s), {sum(len(n) for n in workspace_names)} workspace(s)")
+    except Exception as e:
+        print(f"Error listing project tree: {e}")
+
 def update(project_id=None, name=None, description=None):
     try:
         # If name is provided, find the project by name first
         if name and not project_id:
-            projects = client.projects.list(org, ProjectListOptions())
-            for project in projects:
-                if project.name == name:
-                    project_id = project.id
-                    break
-            else:
-                print(f"Project with name '{name}' not found")
+            project_id = find_project_id(name)
+            if not project_id:
+                print(f"Project with name '{name}' not found{names.did_you_mean(org, 'projects', name)}")
                 return
         
         if not project_id:
@@ -96,28 +187,125 @@ def update(project_id=None, name=None, description=None):
         print(f"Error updating project: {e}")
     pass
 
-def delete(project_id=None, name=None):
+def detach_policy_sets(project_id, workspace_ids, workers=bulk.DEFAULT_WORKERS, run_journal=None):
+    """Remove a project and its workspaces from every policy set they are attached to
+    
+    Each affected policy set gets one batched remove call per relationship.
+    """
+    policy_sets = jsonapi.paginate(
+        http,
+        f"/api/v2/organizations/{org}/policy-sets",
+        params=jsonapi.sparse_fields("policy-sets", "name", "workspaces", "projects"),
+    )
+    changes = []
+    for policy_set in policy_sets:
+        relationships = policy_set.get("relationships", {})
+        attached = {ref["id"] for ref in relationships.get("workspaces", {}).get("data") or []}
+        projects = {ref["id"] for ref in relationships.get("projects", {}).get("data") or []}
+        workspaces = sorted(attached & set(workspace_ids))
+        if workspaces or project_id in projects:
+            changes.append((policy_set, workspaces, project_id in projects))
+    
+    async def detach(aclient, change):
+        policy_set, workspaces, has_project = change
+        if workspaces:
+            await aclient.policy_sets.remove_workspaces(policy_set["id"], workspaces)
+        if has_project:
+            await aclient.policy_sets.remove_projects(policy_set["id"], [project_id])
+        return f"detached {len(workspaces)} workspace(s)" + (" and the project" if has_project else "")
+    
+    return bulk.run(changes, detach, workers=workers, label="Detaching", key=lambda change: change[0]["attributes"]["name"], journal=run_journal)
+
+def delete(project_id=None, name=None, cascade=False, policy_sets=False, check=False, workers=bulk.DEFAULT_WORKERS, assume_yes=False, resume=False):
+    """Delete a project, optionally deleting its workspaces first
+    
+    Args:
+        cascade: Delete the project's workspaces concurrently before the project
+        policy_sets: With cascade, detach the project and its workspaces from policy sets first
+        check: With cascade, skip workspaces with an active run or managed resources
+        resume: With cascade, continue an interrupted run from its journal
+    """
     try:
+        run_journal = None
+        if cascade:
+            run_journal = journal.open_journal(
+                "project-delete",
+                {"org": org, "project_id": project_id, "name": name, "policy_sets": policy_sets, "check": check},
+                resume,
+            )
+        
         # If name is provided, find the project by name first
         if name and not project_id:
-            projects = client.projects.list(org, ProjectListOptions())
-            for project in projects:
-                if project.name == name:
-                    project_id = project.id
-                    break
-            else:
-                print(f"Project with name '{name}' not found")
+            project_id = run_journal.lookup("project-id", lambda: find_project_id(name)) if run_journal else find_project_id(name)
+            if not project_id:
+                print(f"Project with name '{name}' not found{names.did_you_mean(org, 'projects', name)}")
                 return
         
         if not project_id:
             print("Please provide either --name or --id")
             return
         
+        if cascade:
+            start = time.monotonic()
+            
+            def list_workspaces():
+                included = {}
+                fields = ("name", *bulk.DELETE_CHECK_FIELDS) if check else ("name",)
+                params = {"filter[project][id]": project_id, **jsonapi.sparse_fields("workspaces", *fields)}
+                if check:
+                    params.update(bulk.DELETE_CHECK_PARAMS)
+                workspaces = [*jsonapi.paginate(http, f"/api/v2/organizations/{org}/workspaces", params=params, included=included)]
+                return workspaces, jsonapi.index_included({"included": [*included.values()]})
+            
+            # Deleted workspaces drop out of a fresh listing, so resume from the
+            # original match. Only IDs and names are journaled: what --check looks
+            # at can change between runs, so a resumed run lists it again.
+            resumed = "targets" in run_journal.lookups
+            listed, included = list_workspaces() if check or not resumed else ([], {})
+            targets = run_journal.lookup(
+                "targets",
+                lambda: [{"type": "workspaces", "id": workspace["id"], "attributes": {"name": workspace["attributes"]["name"]}} for workspace in listed],
+            )
+            current = {workspace["id"]: workspace for workspace in listed}
+            workspaces = [current.get(target["id"], target) for target in targets]
+            
+            if not bulk.confirm(f"Delete project {name or project_id} and its {len(workspaces)} workspace(s)?", assume_yes):
+                print("Aborted")
+                return
+            
+            if policy_sets:
+                results = detach_policy_sets(project_id, [workspace["id"] for workspace in workspaces], workers, run_journal)
+                if results:
+                    print("Policy sets:")
+                    bulk.print_results(results)
+                if any(result["status"] != "ok" for result in results):
+                    print("Not deleting workspaces because some policy sets could not be detached")
+                    return
+            
+            async def remove(aclient, workspace):
+                if check and workspace["id"] not in current:
+                    raise bulk.Skipped("no longer in the project, not re-checked")
+                if check:
+                    blocker = bulk.delete_blocker(workspace, included)
+                    if blocker:
+                        raise bulk.Skipped(blocker)
+                await aclient.workspaces.delete_by_id(workspace["id"])
+            
+            results = bulk.run(workspaces, remove, workers=workers, label="Deleting workspaces", journal=run_journal)
+            if results:
+                print("Workspaces:")
+                bulk.print_results(results, time.monotonic() - start)
+            if any(result["status"] != "ok" for result in results):
+                print("Not deleting project because some workspaces were not deleted")
+                return
+        
         project = client.projects.delete(project_id)
         print(f"Successfully deleted project")
     except Exception as e:
         print(f"Error deleting project: {e}")
-    pass
+    finally:
+        if run_journal:
+            run_journal.close()
 
 
 
@@ -127,7 +315,9 @@ if __name__ == "__main__":
 
     org = os.getenv("TFE_ORGANIZATION")
 
-    client = TFEClient(TFEConfig())
+    client = session.create_client()
+    # Raw JSON:API calls share the SDK client's connection pool
+    http = client._transport
 
     
     parser = argparse.ArgumentParser(description="Project management CLI")
@@ -146,6 +336,11 @@ if __name__ == "__main__":
     # List command
     list_parser = subparsers.add_parser('list', help='List all projects')
     
+    # Tree command
+    tree_parser = subparsers.add_parser('tree', help='Show projects and their workspaces')
+    tree_parser.add_argument("--name", type=str, help="Only show this project")
+    tree_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent requests")
+    
     # Update command
     update_parser = subparsers.add_parser('update', help='Update a project')
     update_parser.add_argument("--name", type=str, help="Name of the project to update")
@@ -156,6 +351,12 @@ if __name__ == "__main__":
     delete_parser = subparsers.add_parser('delete', help='Delete a project')
     delete_parser.add_argument("--name", type=str, help="Name of the project to delete")
     delete_parser.add_argument("--id", type=str, help="ID of the project to delete")
+    delete_parser.add_argument("--cascade", action="store_true", help="Delete the project's workspaces first")
+    delete_parser.add_argument("--detach-policy-sets", action="store_true", help="With --cascade, detach the project and its workspaces from policy sets first")
+    delete_parser.add_argument("--check", action="store_true", help="With --cascade, skip workspaces with an active run or managed resources")
+    delete_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent requests")
+    delete_parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation")
+    bulk.add_resume_argument(delete_parser)
     
     args = parser.parse_args()
     
@@ -178,6 +379,9 @@ if __name__ == "__main__":
     elif args.command == 'list':
         print("Listing all projects")
         list()
+    elif args.command == 'tree':
+        print("Listing project tree")
+        tree(name=args.name, workers=args.workers)
     elif args.command == 'update':
         print(f"Updating project...")
         if args.description:
@@ -185,6 +389,15 @@ if __name__ == "__main__":
         update(project_id=args.id, name=args.name, description=args.description)
     elif args.command == 'delete':
         print(f"Deleting project...")
-        delete(project_id=args.id, name=args.name)
+        delete(
+            project_id=args.id,
+            name=args.name,
+            cascade=args.cascade,
+            policy_sets=args.detach_policy_sets,
+            check=args.check,
+            workers=args.workers,
+            assume_yes=args.yes,
+            resume=args.resume
+        )
     else:
         parser.print_help()
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""Shared client factory for the CLI scripts.
+
+Every script talks to TFE through one pooled, keep-alive httpx client: the
+pytfe SDK resources and raw JSON:API calls (client._transport) share it, and
+the async backend used by bulk commands is built from the same options.
+Pool sizes default to httpx's and can be raised for high-concurrency runs
+with TFE_MAX_CONNECTIONS and TFE_MAX_KEEPALIVE_CONNECTIONS. When HTTP/2 is
+negotiated, bulk commands multiplex up to TFE_MAX_STREAMS concurrent
+requests over a single connection.
+"""
+import os
+
+import httpx
+from pytfe import TFEClient, TFEConfig
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+# Below nginx's default limit of 128 concurrent streams per connection
+DEFAULT_MAX_STREAMS = 100
+
+
+def limits(max_connections=None, max_keepalive_connections=None):
+    """Build connection pool limits, falling back to the environment"""
+    max_connections = max_connections or int(os.getenv("TFE_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+    max_keepalive_connections = max_keepalive_connections or int(
+        os.getenv("TFE_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_MAX_KEEPALIVE_CONNECTIONS)
+    )
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_keepalive_connections, max_connections),
+    )
+
+
+def max_streams(streams=None):
+    """Maximum concurrent HTTP/2 streams per connection, falling back to the environment"""
+    return streams or int(os.getenv("TFE_MAX_STREAMS", DEFAULT_MAX_STREAMS))
+
+
+def client_options(config, max_connections=None, max_keepalive_connections=None):
+    """Keyword arguments for an httpx client matching a TFEConfig"""
+    return {
+        "http2": config.http2,
+        "timeout": config.timeout,
+        "verify": config.ca_bundle or config.verify_tls,
+        "proxy": config.proxies,
+        "limits": limits(max_connections, max_keepalive_connections),
+    }
+
+
+def create_client(config=None, max_connections=None, max_keepalive_connections=None):
+    """Create a TFEClient whose transport uses a tuned connection pool
+
+    Raw JSON:API calls should go through client._transport so they reuse
+    the same connections as the SDK calls.
+    """
+    config = config or TFEConfig()
+    client = TFEClient(config)
+    # pytfe has no hook for its httpx client, so the one it built is swapped
+    # out; fail loudly if an upgrade moved it rather than silently lose the
+    # pool, HTTP/2 and proxy settings
+    transport = getattr(client, "_transport", None)
+    if not isinstance(getattr(transport, "_sync", None), httpx.Client):
+        raise RuntimeError("pytfe's TFEClient no longer keeps an httpx.Client at _transport._sync; update session.create_client")
+    transport._sync.close()
+    transport._sync = httpx.Client(**client_options(config, max_connections, max_keepalive_connections))
+    return client
@@ -0,0 +1,38 @@
+"""Coalesce concurrent identical calls into one in-flight call.
+
+When bulk actions run in parallel, many of them can ask for the same page or
+resolve the same name at once. A Group runs the first call for a key and hands
+its result (or exception) to every caller that asks for that key while it is
+still in flight. Nothing is cached once the call finishes.
+"""
+import asyncio
+
+
+class Group:
+    """Deduplicate concurrent calls by key on one event loop"""
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, call):
+        """Await call(), or the identical call already in flight for key
+
+        Args:
+            key: Hashable identity of the call, e.g. (method, path, params)
+            call: Zero-argument coroutine function
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda _, key=key: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one caller being cancelled does not cancel the shared call
+        return await asyncio.shield(future)
+
+
+def request_key(method, path, params=None):
+    """Key identifying a request by method, path and query parameters"""
+    return (method, path, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
@@ -1,10 +1,19 @@
 import argparse
+import asyncio
+import csv
 import os
+import sys
+import time
 import dotenv
 import json
+import yaml
 
-from pytfe import TFEClient, TFEConfig
-from pytfe._http import HTTPTransport
+import bulk
+import jsonapi
+import limiter
+import names
+import session
+from async_client import AsyncTFEClient
 
 def create(name, visibility="secret", organization_access=None):
     """Create a new team
@@ -35,33 +44,32 @@ def create(name, visibility="secret", organization_access=None):
     except Exception as e:
         print(f"Error creating team: {e}")
 
+# Side-load team members so read needs a single request
+READ_PARAMS = {"include": "users", **jsonapi.sparse_fields("users", "username")}
+
 def read(name=None, team_id=None):
-    """Read team details by name or ID"""
+    """Read team details and members by name or ID in a single request"""
     try:
-        # If name is provided, we need to list and find it
+        included = {}
         if name and not team_id:
-            response = http.request("GET", f"/api/v2/organizations/{org}/teams")
-            teams_data = response.json()["data"]
-            
-            found_team = None
-            for team in teams_data:
-                if team["attributes"]["name"] == name:
-                    found_team = team
-                    break
-            
-            if not found_team:
-                print(f"Team '{name}' not found")
+            team_data = jsonapi.find_by_name(
+                http,
+                f"/api/v2/organizations/{org}/teams",
+                "teams",
+                name,
+                fields=("visibility", "users-count", "organization-access", "users"),
+                params={"filter[names]": name, **READ_PARAMS},
+                included=included,
+            )
+            if not team_data:
+                print(f"Team '{name}' not found{names.did_you_mean(org, 'teams', name)}")
                 return
-            
-            team_id = found_team["id"]
-        
-        if not team_id:
+        elif team_id:
+            team_data, included = jsonapi.get(http, f"/api/v2/teams/{team_id}", params=READ_PARAMS)
+        else:
             print("Please provide either --name or --id")
             return
         
-        # Get detailed team information
-        response = http.request("GET", f"/api/v2/teams/{team_id}")
-        team_data = response.json()["data"]
         attrs = team_data["attributes"]
         
         print(f"Team: {attrs['name']}")
@@ -70,6 +78,11 @@ def read(name=None, team_id=None):
         print(f"Users Count: {attrs.get('users-count', 'N/A')}")
         if attrs.get('organization-access'):
             print(f"Organization Access: {attrs['organization-access']}")
+        users = jsonapi.related_all(team_data, "users", included)
+        if users:
+            print("Members:")
+            for user in users:
+                print(f"  - {user['attributes'].get('username')} (ID: {user['id']})")
     except Exception as e:
         print(f"Error reading team: {e}")
 
@@ -102,7 +115,7 @@ def update(name=None, team_id=None, new_name=None, visibility=None, organization
                     team_id = team["id"]
                     break
             else:
-                print(f"Team '{name}' not found")
+                print(f"Team '{name}' not found{names.did_you_mean(org, 'teams', name)}")
                 return
         
         if not team_id:
@@ -142,7 +155,7 @@ def delete(name=None, team_id=None):
                     team_id = team["id"]
                     break
             else:
-                print(f"Team '{name}' not found")
+                print(f"Team '{name}' not found{names.did_you_mean(org, 'teams', name)}")
                 return
         
         if not team_id:
@@ -154,26 +167,231 @@ def delete(name=None, team_id=None):
     except Exception as e:
         print(f"Error deleting team: {e}")
 
+async def fetch_access(workers=bulk.DEFAULT_WORKERS):
+    """List teams, projects, workspaces and every team access grant concurrently
+    
+    The API only lists team access filtered by one workspace or project, so
+    there is one (paginated) listing per workspace and project, run
+    concurrently instead of one after another.
+    """
+    workers = limiter.max_in_flight(workers)
+    async with AsyncTFEClient(max_connections=workers) as aclient:
+        teams, projects, workspaces = await asyncio.gather(
+            aclient.fetch_all(f"/api/v2/organizations/{org}/teams", params=jsonapi.sparse_fields("teams", "name", "organization-access")),
+            aclient.fetch_all(f"/api/v2/organizations/{org}/projects", params=jsonapi.sparse_fields("projects", "name")),
+            aclient.fetch_all(f"/api/v2/organizations/{org}/workspaces", params=jsonapi.sparse_fields("workspaces", "name", "project")),
+        )
+        limit = asyncio.Semaphore(max(1, workers))
+        
+        async def grants(kind, resource_id):
+            async with limit:
+                params = {f"filter[{kind}][id]": resource_id, **jsonapi.sparse_fields(f"team-{kind}s", "access", "team", kind)}
+                return [grant async for grant in aclient.paginate(f"/api/v2/team-{kind}s", params=params)]
+        
+        listings = await asyncio.gather(
+            *(grants("workspace", workspace["id"]) for workspace in workspaces),
+            *(grants("project", project["id"]) for project in projects),
+        )
+    return teams, projects, workspaces, [grant for listing in listings for grant in listing]
+
+def access_grants(teams, projects, workspaces, grants):
+    """Join access grants to names in memory, yielding one record per workspace and team
+    
+    Each record lists the team's access to the workspace and where it comes
+    from: the workspace itself, the workspace's project, or organization-wide
+    permission to manage all workspaces.
+    """
+    team_names = {team["id"]: team["attributes"]["name"] for team in teams}
+    project_names = {project["id"]: project["attributes"]["name"] for project in projects}
+    # Plain dicts: list() is this script's list command
+    workspace_access = {}
+    project_access = {}
+    for grant in grants:
+        team_id = jsonapi.related_id(grant, "team")
+        if jsonapi.related_id(grant, "workspace"):
+            workspace_access.setdefault(jsonapi.related_id(grant, "workspace"), []).append((team_id, grant["attributes"]["access"], "workspace"))
+        else:
+            project_access.setdefault(jsonapi.related_id(grant, "project"), []).append((team_id, grant["attributes"]["access"], "project"))
+    org_wide = [
+        (team["id"], "admin", "organization")
+        for team in teams
+        if (team["attributes"].get("organization-access") or {}).get("manage-workspaces")
+    ]
+    for workspace in sorted(workspaces, key=lambda workspace: workspace["attributes"]["name"]):
+        project_id = jsonapi.related_id(workspace, "project")
+        for team_id, access, via in workspace_access.get(workspace["id"], []) + project_access.get(project_id, []) + org_wide:
+            yield {
+                "workspace": workspace["attributes"]["name"],
+                "workspace_id": workspace["id"],
+                "project": project_names.get(project_id, ""),
+                "team": team_names.get(team_id, team_id),
+                "team_id": team_id,
+                "access": access,
+                "via": via,
+            }
+
+def access_matrix(output_format="csv", output=None, workers=bulk.DEFAULT_WORKERS):
+    """Write every team's access to every workspace, for access reviews
+    
+    csv writes a teams x workspaces table, where a cell lists the team's
+    access, prefixed with "project:" or "organization:" when inherited.
+    ndjson writes one record per workspace, team and grant.
+    """
+    log = sys.stderr if output is None else sys.stdout
+    try:
+        start = time.monotonic()
+        teams, projects, workspaces, grants = asyncio.run(fetch_access(workers))
+        records = [*access_grants(teams, projects, workspaces, grants)]
+        
+        out = open(output, "w", newline="") if output else sys.stdout
+        try:
+            if output_format == "ndjson":
+                for record in records:
+                    out.write(json.dumps(record) + "\n")
+            else:
+                team_names = sorted(team["attributes"]["name"] for team in teams)
+                cells = {}
+                for record in records:
+                    level = record["access"] if record["via"] == "workspace" else f"{record['via']}:{record['access']}"
+                    cells.setdefault((record["workspace_id"], record["team"]), []).append(level)
+                writer = csv.writer(out)
+                writer.writerow(["workspace", "project", *team_names])
+                project_names = {project["id"]: project["attributes"]["name"] for project in projects}
+                for workspace in sorted(workspaces, key=lambda workspace: workspace["attributes"]["name"]):
+                    writer.writerow([
+                        workspace["attributes"]["name"],
+                        project_names.get(jsonapi.related_id(workspace, "project"), ""),
+                        *(";".join(cells.get((workspace["id"], team), [])) for team in team_names),
+                    ])
+        finally:
+            if output:
+                out.close()
+        print(
+            f"{len(records)} grant(s) for {len(teams)} team(s) across {len(workspaces)} workspace(s) "
+            f"and {len(projects)} project(s) in {time.monotonic() - start:.2f}s",
+            file=log,
+        )
+    except Exception as e:
+        print(f"Error building access matrix: {e}", file=log)
+
+# Organization members with their usernames side-loaded
+MEMBERSHIP_PARAMS = {
+    "include": "user",
+    **jsonapi.sparse_fields("organization-memberships", "email", "user"),
+    **jsonapi.sparse_fields("users", "username"),
+}
+
+def read_users(path):
+    """Read usernames or emails, one per line; blank lines and # comments are skipped"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+def read_team_mapping(path):
+    """Read team names mapped to usernames or emails
+    
+    YAML/JSON files map each team to a list of users. CSV files (such as an
+    IdP group export) have one team,user row per membership and an optional
+    header row.
+    """
+    if path.endswith(".csv"):
+        mapping = {}
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or not row[0].strip() or row[0].startswith("#") or row[0].strip().lower() == "team":
+                    continue
+                mapping.setdefault(row[0].strip(), []).append(row[1].strip())
+        return mapping
+    with open(path) as f:
+        mapping = yaml.safe_load(f) or {}
+    if not isinstance(mapping, dict) or any(isinstance(users, (str, dict)) for users in mapping.values()):
+        raise ValueError(f"Mapping file {path} must map team names to lists of users")
+    return {str(team): [str(user) for user in users or []] for team, users in mapping.items()}
+
+def organization_members():
+    """Index organization memberships by lowercased username and email
+    
+    Returns:
+        Tuple of ({username or email: membership ID}, {membership ID: display name})
+    """
+    included = {}
+    by_user = {}
+    display = {}
+    for membership in jsonapi.paginate(http, f"/api/v2/organizations/{org}/organization-memberships", params=MEMBERSHIP_PARAMS, included=included):
+        user = jsonapi.related(membership, "user", included)
+        username = user["attributes"].get("username") if user else None
+        email = membership["attributes"].get("email")
+        display[membership["id"]] = username or email or membership["id"]
+        for key in (username, email):
+            if key:
+                by_user[key.lower()] = membership["id"]
+    return by_user, display
+
+def members_sync(name=None, users_file=None, mapping_file=None, workers=bulk.DEFAULT_WORKERS, dry_run=False):
+    """Make team membership match a users file, or many teams match a mapping file
+    
+    Members not listed are removed. Additions and removals are sent as
+    batched organization-membership relationship calls, and teams in a
+    mapping are synced concurrently.
+    """
+    try:
+        mapping = read_team_mapping(mapping_file) if mapping_file else {name: read_users(users_file)}
+        by_user, display = organization_members()
+        teams = {
+            team["attributes"]["name"]: team
+            for team in jsonapi.paginate(http, f"/api/v2/organizations/{org}/teams", params=jsonapi.sparse_fields("teams", "name"))
+        }
+        for team_name in mapping:
+            if team_name not in teams:
+                print(f"Team '{team_name}' not found{names.did_you_mean(org, 'teams', team_name)}")
+        items = [(teams[team_name], users) for team_name, users in mapping.items() if team_name in teams]
+        if not items:
+            return
+        
+        async def sync(aclient, item):
+            team, users = item
+            wanted = {}
+            unknown = []
+            for user in users:
+                if user.lower() in by_user:
+                    wanted[by_user[user.lower()]] = user
+                else:
+                    unknown.append(user)
+            if not wanted:
+                raise bulk.Skipped("no listed user is an organization member; not emptying the team")
+            
+            current, _ = await aclient.get(f"/api/v2/teams/{team['id']}", params=jsonapi.sparse_fields("teams", "organization-memberships"))
+            current_ids = {ref["id"] for ref in current.get("relationships", {}).get("organization-memberships", {}).get("data") or []}
+            to_add = [membership_id for membership_id in wanted if membership_id not in current_ids]
+            to_remove = sorted(current_ids - wanted.keys())
+            path = f"/api/v2/teams/{team['id']}/relationships/organization-memberships"
+            if not dry_run:
+                for method, ids in (("POST", to_add), ("DELETE", to_remove)):
+                    for batch in bulk.chunked(ids):
+                        await aclient.request(method, path, json_body=jsonapi.relationship_data("organization-memberships", batch))
+            
+            added, removed = ("would add", "would remove") if dry_run else ("added", "removed")
+            parts = []
+            if to_add:
+                parts.append(f"{added} {', '.join(wanted[membership_id] for membership_id in to_add)}")
+            if to_remove:
+                parts.append(f"{removed} {', '.join(display.get(membership_id, membership_id) for membership_id in to_remove)}")
+            if unknown:
+                parts.append(f"not organization members: {', '.join(unknown)}")
+            return "; ".join(parts) or "in sync"
+        
+        start = time.monotonic()
+        results = bulk.run(items, sync, workers=workers, label="Syncing", key=lambda item: item[0]["attributes"]["name"])
+        bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error syncing team members: {e}")
+
 if __name__ == "__main__":
     dotenv.load_dotenv()
     
     org = os.getenv("TFE_ORGANIZATION")
-    config = TFEConfig()
-    client = TFEClient(config)
-    http = HTTPTransport(
-        address=config.address,
-        token=config.token,
-        timeout=config.timeout,
-        verify_tls=config.verify_tls,
-        user_agent_suffix=config.user_agent_suffix,
-        max_retries=config.max_retries,
-        backoff_base=config.backoff_base,
-        backoff_cap=config.backoff_cap,
-        backoff_jitter=config.backoff_jitter,
-        http2=config.http2,
-        proxies=config.proxies,
-        ca_bundle=config.ca_bundle
-    )
+    client = session.create_client()
+    # Raw JSON:API calls share the SDK client's connection pool
+    http = client._transport
     
     parser = argparse.ArgumentParser(description="Team management CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -203,6 +421,20 @@ if __name__ == "__main__":
     delete_parser.add_argument("--name", type=str, help="Name of the team to delete")
     delete_parser.add_argument("--id", type=str, help="ID of the team to delete")
     
+    # Members sync command
+    sync_parser = subparsers.add_parser('members-sync', help='Make team membership match a users file or a team mapping')
+    sync_parser.add_argument("--name", type=str, help="Team to sync from --file")
+    sync_parser.add_argument("--file", type=str, help="Usernames or emails, one per line")
+    sync_parser.add_argument("--mapping", type=str, help="YAML/JSON of team: [users], or CSV of team,user rows, to sync many teams")
+    sync_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent requests")
+    sync_parser.add_argument("--dry-run", action="store_true", help="Show the changes without making them")
+    
+    # Access matrix command
+    matrix_parser = subparsers.add_parser('access-matrix', help='Report every team\'s access to every workspace')
+    matrix_parser.add_argument("--format", type=str, choices=["csv", "ndjson"], default="csv", help="csv: teams x workspaces table; ndjson: one record per grant")
+    matrix_parser.add_argument("--output", type=str, help="File to write (defaults to stdout)")
+    matrix_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent requests")
+    
     args = parser.parse_args()
     
     # Handle commands
@@ -228,5 +460,18 @@ if __name__ == "__main__":
     elif args.command == 'delete':
         print(f"Deleting team...")
         delete(name=args.name, team_id=args.id)
+    elif args.command == 'members-sync':
+        if args.mapping:
+            print(f"Syncing team members from: {args.mapping}")
+            members_sync(mapping_file=args.mapping, workers=args.workers, dry_run=args.dry_run)
+        elif args.name and args.file:
+            print(f"Syncing members of team: {args.name}")
+            members_sync(name=args.name, users_file=args.file, workers=args.workers, dry_run=args.dry_run)
+        else:
+            print("Please provide --name and --file, or --mapping")
+            sync_parser.print_help()
+    elif args.command == 'access-matrix':
+        print("Building team access matrix", file=sys.stderr if not args.output else sys.stdout)
+        access_matrix(output_format=args.format, output=args.output, workers=args.workers)
     else:
         parser.print_help()
\ No newline at end of file
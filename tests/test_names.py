@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import names
+
+ENTRIES = [
+    ("workspaces", "networking-prod", "ws-1"),
+    ("workspaces", "net", "ws-2"),
+    ("workspaces", "network", "ws-3"),
+    ("projects", "networking", "prj-1"),
+    ("teams", "owners", "team-1"),
+    ("workspaces", "billing-api", "ws-4"),
+]
+
+
+@pytest.fixture
+def index():
+    return names.NameIndex(ENTRIES, built=0)
+
+
+def test_substring_matches_shortest_first(index):
+    assert [match[1] for match in index.search("net")] == ["net", "network", "networking", "networking-prod"]
+    assert all(match[3] == 1.0 for match in index.search("net"))
+
+
+def test_search_ignores_case(index):
+    assert index.search("NETWORK", limit=1) == [("workspaces", "network", "ws-3", 1.0)]
+
+
+def test_prefix_within_type(index):
+    assert index.search("net", "projects") == [("projects", "networking", "prj-1", 1.0)]
+    assert index.search("bill", "workspaces") == [("workspaces", "billing-api", "ws-4", 1.0)]
+
+
+def test_limit(index):
+    assert [match[1] for match in index.search("net", limit=2)] == ["net", "network"]
+
+
+def test_typo_falls_back_to_similar_names(index):
+    matches = index.search("biling-api")
+    assert [match[1] for match in matches] == ["billing-api"]
+    assert 0 < matches[0][3] < 1.0
+
+
+def test_typo_ranks_closest_first(index):
+    matches = index.search("netwrk", "workspaces")
+    assert matches[0][1] == "network"
+    assert [match[3] for match in matches] == sorted((match[3] for match in matches), reverse=True)
+
+
+def test_no_match(index):
+    assert index.search("zzzz") == []
+
+
+@pytest.mark.parametrize("text", ["", "   "])
+def test_blank_query_matches_nothing(index, text):
+    assert index.search(text) == []
+
+
+def test_type_without_entries(index):
+    assert index.search("net", "varsets") == []
+
+
+def test_suggest(index):
+    assert index.suggest("workspaces", "biling") == ["billing-api"]
+    assert index.suggest("teams", "owner") == ["owners"]
+
+
+def test_saved_postings_give_same_results(index):
+    saved = json.loads(json.dumps(index.to_cache()))
+    restored = names.NameIndex(index.entries, index.built, saved)
+    for text in ("net", "netwrk", "biling-api", "owners"):
+        assert restored.search(text) == index.search(text)
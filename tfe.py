@@ -0,0 +1,504 @@
+"""Organization-wide commands that span several resource types.
+
+list prints one resource type across several organizations and hosts
+(profiles.py), find searches the names of every resource type in the local
+name index (names.py), and migrate copies an organization's projects, teams, variable sets, policy sets
+and workspaces (with their variables and attachments) into another
+organization, on the same host or another TFC/TFE instance.
+"""
+import argparse
+import asyncio
+import os
+import time
+import dotenv
+
+import bulk
+import journal
+import jsonapi
+import limiter
+import names
+import pipeline
+import profiles
+from async_client import AsyncTFEClient, resource_body
+from pytfe import TFEConfig
+from pytfe.errors import NotFound, TFEError
+from pytfe.models import Tag, WorkspaceCreateOptions
+
+# Migration phases in dependency order; each only refers to resources created by earlier ones
+MIGRATE_PHASES = (
+    "projects",
+    "teams",
+    "varsets",
+    "varset-variables",
+    "policy-sets",
+    "workspaces",
+    "workspace-variables",
+    "attachments",
+)
+
+# Attributes copied for each resource type
+PROJECT_FIELDS = ("name", "description")
+TEAM_FIELDS = ("name", "visibility", "organization-access")
+VARSET_FIELDS = ("name", "description", "global", "priority")
+POLICY_SET_FIELDS = ("name", "description", "kind", "global", "overridable")
+VARIABLE_FIELDS = ("key", "value", "description", "category", "hcl", "sensitive")
+
+
+def copied(attrs, fields):
+    """The given attributes of a resource, without unset ones"""
+    return {field: attrs[field] for field in fields if attrs.get(field) is not None}
+
+
+def variable_name(parent, variable):
+    attrs = variable["attributes"]
+    return f"{parent['attributes']['name']}/{attrs['category']}:{attrs['key']}"
+
+
+class Migration:
+    """Copy resources between organizations, one phase at a time
+
+    Source IDs are mapped to target IDs in the journal, so a resumed run can
+    still attach resources that an earlier run created. Resources that
+    already exist in the target organization under the same name are
+    adopted instead of failing.
+    """
+
+    def __init__(self, source, target, from_org, to_org, run_journal, secrets=None, dry_run=False):
+        self.source = source
+        self.target = target
+        self.from_org = from_org
+        self.to_org = to_org
+        self.journal = run_journal
+        self.secrets = secrets or {}
+        self.dry_run = dry_run
+
+    def target_id(self, resource_type, source_id):
+        return self.journal.lookups.get(f"id:{resource_type}:{source_id}")
+
+    async def create(self, resource_type, source_id, path, attrs, relationships=None, existing=None):
+        """Create a resource in the target and record its ID
+
+        Args:
+            resource_type: JSON:API type of the resource
+            source_id: ID of the resource in the source organization, or None
+                if nothing refers to it later
+            path: Collection to POST to
+            attrs: Attributes of the new resource
+            relationships: Optional JSON:API relationships
+            existing: Optional coroutine function returning the ID of a
+                matching resource already in the target, tried on a 422
+        """
+        if self.dry_run:
+            target_id, detail = f"dry-run-{source_id}", "would create"
+        else:
+            try:
+                response = await self.target.request("POST", path, json_body=resource_body(resource_type, attrs, relationships))
+                target_id, detail = response.json()["data"]["id"], "created"
+            except TFEError as e:
+                target_id = await existing() if existing and e.status == 422 else None
+                if not target_id:
+                    raise
+                detail = "already exists"
+        if source_id:
+            self.journal.remember(f"id:{resource_type}:{source_id}", target_id)
+        return f"{detail} {target_id}"
+
+    async def existing_variable(self, path, attrs):
+        async for variable in self.target.paginate(path):
+            if (variable["attributes"]["key"], variable["attributes"]["category"]) == (attrs["key"], attrs["category"]):
+                return variable["id"]
+        return None
+
+    def variable_attributes(self, variable):
+        attrs = copied(variable["attributes"], VARIABLE_FIELDS)
+        if attrs.get("sensitive"):
+            value = bulk.secret_value(self.secrets, variable["attributes"])
+            if value is None:
+                raise bulk.Skipped("sensitive value not in the secrets file")
+            attrs["value"] = value
+        return attrs
+
+    def parent_id(self, resource_type, parent):
+        parent_id = self.target_id(resource_type, parent["id"])
+        if not parent_id:
+            raise bulk.Skipped(f"{resource_type[:-1]} {parent['attributes']['name']} was not migrated")
+        return parent_id
+
+    # Each phase returns (source, transform, write, key) for pipeline.stream
+
+    def projects(self):
+        path = f"/api/v2/organizations/{self.to_org}/projects"
+
+        async def transform(project):
+            return copied(project["attributes"], PROJECT_FIELDS)
+
+        async def write(project, attrs):
+            # Every organization has a "Default Project", which is adopted here
+            existing = lambda: self.target.find_id(path, "projects", attrs["name"], params={"filter[names]": attrs["name"]})
+            return await self.create("projects", project["id"], path, attrs, existing=existing)
+
+        source = self.source.projects.list(self.from_org, params=jsonapi.sparse_fields("projects", *PROJECT_FIELDS))
+        return source, transform, write, lambda project: project["attributes"]["name"]
+
+    def teams(self):
+        path = f"/api/v2/organizations/{self.to_org}/teams"
+
+        async def transform(team):
+            return copied(team["attributes"], TEAM_FIELDS)
+
+        async def write(team, attrs):
+            # The owners team always exists and is adopted
+            existing = lambda: self.target.find_id(path, "teams", attrs["name"], params={"filter[names]": attrs["name"]})
+            return await self.create("teams", team["id"], path, attrs, existing=existing)
+
+        source = self.source.teams.list(self.from_org, params=jsonapi.sparse_fields("teams", *TEAM_FIELDS))
+        return source, transform, write, lambda team: team["attributes"]["name"]
+
+    def varsets(self):
+        path = f"/api/v2/organizations/{self.to_org}/varsets"
+
+        async def transform(varset):
+            return copied(varset["attributes"], VARSET_FIELDS)
+
+        async def write(varset, attrs):
+            existing = lambda: self.target.find_id(path, "varsets", attrs["name"], params={"q": attrs["name"]})
+            return await self.create("varsets", varset["id"], path, attrs, existing=existing)
+
+        source = self.source.variable_sets.list(self.from_org, params=jsonapi.sparse_fields("varsets", *VARSET_FIELDS))
+        return source, transform, write, lambda varset: varset["attributes"]["name"]
+
+    def varset_variables(self):
+        async def source():
+            async for varset in self.source.variable_sets.list(self.from_org, params=jsonapi.sparse_fields("varsets", "name")):
+                async for variable in self.source.variable_set_variables.list(varset["id"]):
+                    yield varset, variable
+
+        async def transform(entry):
+            varset, variable = entry
+            return self.parent_id("varsets", varset), self.variable_attributes(variable)
+
+        async def write(entry, payload):
+            varset_id, attrs = payload
+            path = f"/api/v2/varsets/{varset_id}/relationships/vars"
+            return await self.create("vars", None, path, attrs, existing=lambda: self.existing_variable(path, attrs))
+
+        return source(), transform, write, lambda entry: variable_name(*entry)
+
+    def policy_sets(self):
+        path = f"/api/v2/organizations/{self.to_org}/policy-sets"
+
+        async def transform(policy_set):
+            return copied(policy_set["attributes"], POLICY_SET_FIELDS)
+
+        async def write(policy_set, attrs):
+            existing = lambda: self.target.find_id(path, "policy-sets", attrs["name"], params={"search[name]": attrs["name"]})
+            return await self.create("policy-sets", policy_set["id"], path, attrs, existing=existing)
+
+        source = self.source.policy_sets.list(self.from_org, params=jsonapi.sparse_fields("policy-sets", *POLICY_SET_FIELDS))
+        return source, transform, write, lambda policy_set: policy_set["attributes"]["name"]
+
+    def workspaces(self):
+        path = f"/api/v2/organizations/{self.to_org}/workspaces"
+
+        async def transform(workspace):
+            attrs = workspace["attributes"]
+            fields = {field.replace("-", "_"): attrs[field] for field in bulk.WORKSPACE_SETTINGS if attrs.get(field) is not None}
+            note = ""
+            # Agent pools belong to the source organization
+            if fields.get("execution_mode") == "agent":
+                fields["execution_mode"] = "remote"
+                note = " (agent execution changed to remote)"
+            project = (workspace.get("relationships", {}).get("project", {}).get("data") or {}).get("id")
+            project_id = self.target_id("projects", project) if project else None
+            options = WorkspaceCreateOptions(
+                name=attrs["name"],
+                project={"id": project_id} if project_id else None,
+                tags=[Tag(name=tag) for tag in attrs.get("tag-names") or []],
+                **fields,
+            )
+            return options, note
+
+        async def existing(name):
+            try:
+                return (await self.target.workspaces.read(name, organization=self.to_org))["id"]
+            except NotFound:
+                return None
+
+        async def write(workspace, payload):
+            options, note = payload
+            if self.dry_run:
+                detail = await self.create("workspaces", workspace["id"], path, {})
+            else:
+                try:
+                    created = await self.target.workspaces.create(self.to_org, options)
+                    target_id, detail = created["id"], "created"
+                except TFEError as e:
+                    target_id = await existing(options.name) if e.status == 422 else None
+                    if not target_id:
+                        raise
+                    detail = "already exists"
+                self.journal.remember(f"id:workspaces:{workspace['id']}", target_id)
+                detail = f"{detail} {target_id}"
+            return detail + note
+
+        params = jsonapi.sparse_fields("workspaces", "name", *bulk.WORKSPACE_SETTINGS, "tag-names", "project")
+        return self.source.workspaces.list(self.from_org, params=params), transform, write, lambda workspace: workspace["attributes"]["name"]
+
+    def workspace_variables(self):
+        async def source():
+            async for workspace in self.source.workspaces.list(self.from_org, params=jsonapi.sparse_fields("workspaces", "name")):
+                async for variable in self.source.variables.list(workspace["id"]):
+                    yield workspace, variable
+
+        async def transform(entry):
+            workspace, variable = entry
+            return self.parent_id("workspaces", workspace), self.variable_attributes(variable)
+
+        async def write(entry, payload):
+            workspace_id, attrs = payload
+            path = f"/api/v2/workspaces/{workspace_id}/vars"
+            return await self.create("vars", None, path, attrs, existing=lambda: self.existing_variable(path, attrs))
+
+        return source(), transform, write, lambda entry: variable_name(*entry)
+
+    def attachments(self):
+        async def source():
+            params = jsonapi.sparse_fields("varsets", "name", "workspaces", "projects")
+            async for varset in self.source.variable_sets.list(self.from_org, params=params):
+                yield "varsets", varset
+            params = jsonapi.sparse_fields("policy-sets", "name", "workspaces", "projects")
+            async for policy_set in self.source.policy_sets.list(self.from_org, params=params):
+                yield "policy-sets", policy_set
+
+        def mapped(resource, relation, resource_type):
+            refs = resource.get("relationships", {}).get(relation, {}).get("data") or []
+            return [target for ref in refs if (target := self.target_id(resource_type, ref["id"]))]
+
+        async def transform(entry):
+            resource_type, resource = entry
+            set_id = self.parent_id(resource_type, resource)
+            workspace_ids = mapped(resource, "workspaces", "workspaces")
+            project_ids = mapped(resource, "projects", "projects")
+            if not workspace_ids and not project_ids:
+                raise bulk.Skipped("not attached to any migrated workspace or project")
+            return set_id, workspace_ids, project_ids
+
+        async def write(entry, payload):
+            resource_type, _ = entry
+            set_id, workspace_ids, project_ids = payload
+            if not self.dry_run:
+                if resource_type == "varsets":
+                    add_workspaces, add_projects = self.target.variable_sets.apply_to_workspaces, self.target.variable_sets.apply_to_projects
+                else:
+                    add_workspaces, add_projects = self.target.policy_sets.add_workspaces, self.target.policy_sets.add_projects
+                for batch in bulk.chunked(workspace_ids):
+                    await add_workspaces(set_id, batch)
+                for batch in bulk.chunked(project_ids):
+                    await add_projects(set_id, batch)
+            return f"{len(workspace_ids)} workspace(s), {len(project_ids)} project(s)"
+
+        def key(entry):
+            resource_type, resource = entry
+            return f"{'variable set' if resource_type == 'varsets' else 'policy set'} {resource['attributes']['name']}"
+
+        return source(), transform, write, key
+
+
+async def run_migration(target_config, to_org, phases, secrets, workers, queue_size, run_journal, dry_run):
+    # The target may be another host, so it gets its own connection pool (and limiter if so)
+    workers = limiter.max_in_flight(workers)
+    async with AsyncTFEClient(max_connections=workers) as source, \
+            AsyncTFEClient(target_config, max_connections=workers) as target:
+        migration = Migration(source, target, org, to_org, run_journal, secrets, dry_run)
+        for phase in phases:
+            print(f"\n== {phase}")
+            start = time.monotonic()
+            results = await pipeline.stream(
+                *getattr(migration, phase.replace("-", "_"))(),
+                workers=workers,
+                queue_size=queue_size,
+                label=phase,
+                journal=run_journal,
+            )
+            if results:
+                bulk.print_results(results, time.monotonic() - start, problems_only=True)
+            else:
+                print(f"No {phase} to migrate")
+
+
+def migrate(to_org, to_address=None, only=None, secrets_file=None, workers=bulk.DEFAULT_WORKERS, queue_size=pipeline.QUEUE_SIZE, dry_run=False, resume=False):
+    """Copy projects, teams, variable sets, policy sets and workspaces to another organization
+
+    The target host and token come from to_address / TFE_TARGET_ADDRESS and
+    TFE_TARGET_TOKEN, falling back to the source's. Sensitive variable values
+    cannot be read back from the API, so they are taken from secrets_file.
+    Team membership, policies and VCS connections are not copied.
+    """
+    phases = MIGRATE_PHASES
+    if only:
+        unknown = set(only) - set(MIGRATE_PHASES)
+        if unknown:
+            print(f"Unknown phase(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(MIGRATE_PHASES)}")
+            return
+        phases = [phase for phase in MIGRATE_PHASES if phase in only]
+
+    target_config = TFEConfig(
+        address=to_address or os.getenv("TFE_TARGET_ADDRESS") or os.getenv("TFE_ADDRESS", "https://app.terraform.io"),
+        token=os.getenv("TFE_TARGET_TOKEN") or os.getenv("TFE_TOKEN", ""),
+    )
+    run_journal = None
+    try:
+        secrets = bulk.load_secrets(secrets_file) if secrets_file else {}
+        run_journal = journal.open_journal(
+            "migrate",
+            {"from": [os.getenv("TFE_ADDRESS"), org], "to": [target_config.address, to_org]},
+            resume,
+            dry_run,
+        )
+        asyncio.run(run_migration(target_config, to_org, phases, secrets, workers, queue_size, run_journal, dry_run))
+    except Exception as e:
+        print(f"Error migrating organization: {e}")
+    finally:
+        if run_journal:
+            run_journal.close()
+
+
+def cell(value):
+    """Format an attribute value for a table column"""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(item) for item in value)
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def list_resources(resource_type, orgs=None, profiles_path=None, fields=None, workers=bulk.DEFAULT_WORKERS):
+    """List one resource type across organizations, with an ORG column
+
+    Args:
+        resource_type: JSON:API collection, e.g. workspaces
+        orgs: Comma-separated organizations
+        profiles_path: YAML profiles file (see profiles.py)
+        fields: Extra attributes to show as columns, e.g. ["terraform-version"]
+        workers: Connection pool size per host
+    """
+    fields = fields or []
+    try:
+        selected = profiles.targets(orgs, profiles_path)
+
+        async def fetch(aclient, target_org):
+            return await aclient.fetch_all(
+                f"/api/v2/organizations/{target_org}/{resource_type}",
+                params=jsonapi.sparse_fields(resource_type, "name", *fields),
+            )
+
+        start = time.monotonic()
+        results = profiles.run(selected, fetch, workers)
+        elapsed = time.monotonic() - start
+
+        rows = []
+        failed = 0
+        for label, result in zip(profiles.labels(selected), results):
+            if isinstance(result, Exception):
+                print(f"Error listing {resource_type} in {label}: {result}")
+                failed += 1
+                continue
+            for item in result:
+                attrs = item.get("attributes", {})
+                rows.append([label, attrs.get("name", ""), item["id"], *(cell(attrs.get(field)) for field in fields)])
+
+        header = ["ORG", "NAME", "ID", *(field.upper() for field in fields)]
+        rows.sort(key=lambda row: (row[0], row[1].lower()))
+        widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+        for row in [header, *rows]:
+            print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+        print(f"{len(rows)} {resource_type} in {len(selected) - failed} organization(s) in {elapsed:.2f}s")
+    except Exception as e:
+        print(f"Error listing {resource_type}: {e}")
+
+
+def find(text, resource_type=None, refresh=False, limit=20):
+    """Search resource names containing or resembling text in the local name index"""
+    if not text.strip():
+        print("Please provide text to search for")
+        return
+    try:
+        index = names.load(org, refresh)
+        start = time.perf_counter()
+        matches = index.search(text, resource_type, limit)
+        elapsed = time.perf_counter() - start
+        if not matches:
+            print(f"No names match '{text}'")
+        else:
+            width = max(len("NAME"), *(len(match[1]) for match in matches))
+            print(f"{'TYPE':<12}  {'NAME':<{width}}  ID")
+            for match_type, name, match_id, score in matches:
+                print(f"{names.RESOURCE_TYPES[match_type]:<12}  {name:<{width}}  {match_id}")
+        age = time.time() - index.built
+        print(f"{len(matches)} match(es) among {len(index.entries)} names in {elapsed * 1000:.2f} ms (index built {age / 60:.0f} min ago; --refresh to rebuild)")
+    except Exception as e:
+        print(f"Error searching names: {e}")
+
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+
+    org = os.getenv("TFE_ORGANIZATION")
+
+    parser = argparse.ArgumentParser(description="Organization-wide TFE commands")
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+
+    # List command
+    list_parser = subparsers.add_parser('list', help='List a resource type across organizations and hosts')
+    list_parser.add_argument("resource_type", type=str, choices=[*names.RESOURCE_TYPES], help="Resource type to list")
+    list_parser.add_argument("--fields", type=str, help="Comma-separated attributes to add as columns, e.g. terraform-version,execution-mode")
+    list_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum connections per host")
+    profiles.add_arguments(list_parser)
+
+    # Find command
+    find_parser = subparsers.add_parser('find', help='Search resource names across all resource types')
+    find_parser.add_argument("text", type=str, help="Text to search for; close misspellings also match")
+    find_parser.add_argument("--type", type=str, choices=[*names.RESOURCE_TYPES], dest="resource_type", help="Only this resource type")
+    find_parser.add_argument("--limit", type=int, default=20, help="Maximum number of matches")
+    find_parser.add_argument("--refresh", action="store_true", help="Rebuild the name index from the API first")
+
+    # Migrate command
+    migrate_parser = subparsers.add_parser('migrate', help='Copy an organization into another organization or instance')
+    migrate_parser.add_argument("--to-org", type=str, required=True, help="Target organization")
+    migrate_parser.add_argument("--to-address", type=str, help="Target TFE address (defaults to TFE_TARGET_ADDRESS, then TFE_ADDRESS)")
+    migrate_parser.add_argument("--only", type=str, help=f"Comma-separated phases to run: {', '.join(MIGRATE_PHASES)}")
+    migrate_parser.add_argument("--secrets", type=str, help="YAML/JSON file with values for sensitive variables, keyed by key or category:key")
+    migrate_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent writes per phase")
+    migrate_parser.add_argument("--queue-size", type=int, default=pipeline.QUEUE_SIZE, help="Items buffered between pipeline stages")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Read everything and show what would be created")
+    bulk.add_resume_argument(migrate_parser)
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        print(f"Listing {args.resource_type}")
+        list_resources(
+            resource_type=args.resource_type,
+            orgs=args.org,
+            profiles_path=args.profiles,
+            fields=[field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None,
+            workers=args.workers,
+        )
+    elif args.command == 'find':
+        find(text=args.text, resource_type=args.resource_type, refresh=args.refresh, limit=args.limit)
+    elif args.command == 'migrate':
+        print(f"Migrating organization {org} to {args.to_org}{' (dry run)' if args.dry_run else ''}")
+        migrate(
+            to_org=args.to_org,
+            to_address=args.to_address,
+            only=[phase.strip() for phase in args.only.split(",") if phase.strip()] if args.only else None,
+            secrets_file=args.secrets,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            dry_run=args.dry_run,
+            resume=args.resume,
+        )
+    else:
+        parser.print_help()
@@ -2,7 +2,7 @@ import argparse
 import os
 import dotenv
 
-from pytfe import TFEClient, TFEConfig
+import session
 from pytfe.models import (
     VariableCreateOptions,
     VariableListOptions,
@@ -168,7 +168,7 @@ if __name__ == "__main__":
     dotenv.load_dotenv()
     
     org = os.getenv("TFE_ORGANIZATION")
-    client = TFEClient(TFEConfig())
+    client = session.create_client()
     
     parser = argparse.ArgumentParser(description="Workspace Variable management CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -1,11 +1,14 @@
 import argparse
 import os
+import time
 import dotenv
 
-from pytfe import TFEClient, TFEConfig
+import bulk
+import jsonapi
+import names
+import session
 from pytfe.models import (
     VariableSetCreateOptions,
-    VariableSetListOptions,
     VariableSetUpdateOptions,
     VariableSetVariableCreateOptions,
     VariableSetVariableListOptions,
@@ -27,38 +30,53 @@ def create(name, description, is_global):
     except Exception as e:
         print(f"Error creating variable set: {e}")
 
+def find_varset_id(name):
+    """Find a variable set ID by exact name, fetching only the name field"""
+    return jsonapi.find_id(
+        http,
+        f"/api/v2/organizations/{org}/varsets",
+        "varsets",
+        name,
+        params={"q": name},
+    )
+
 def read(name):
     try:
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        for varset in varsets:
-            if varset.name == name:
-                print(f"Variable Set: {varset.name}")
-                print(f"Description: {varset.description}")
-                print(f"ID: {varset.id}")
-                return
-        print(f"Variable set with name {name} not found")
+        varset = jsonapi.find_by_name(
+            http,
+            f"/api/v2/organizations/{org}/varsets",
+            "varsets",
+            name,
+            fields=("description",),
+            params={"q": name},
+        )
+        if varset:
+            print(f"Variable Set: {varset['attributes']['name']}")
+            print(f"Description: {varset['attributes'].get('description')}")
+            print(f"ID: {varset['id']}")
+            return
+        print(f"Variable set with name {name} not found{names.did_you_mean(org, 'varsets', name)}")
     except Exception as e:
         print(f"Error reading variable set: {e}")
 
 def list():
     try:
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
+        varsets = jsonapi.paginate(
+            http,
+            f"/api/v2/organizations/{org}/varsets",
+            params=jsonapi.sparse_fields("varsets", "name"),
+        )
         for varset in varsets:
-            print(f"- {varset.name} (ID: {varset.id})")
+            print(f"- {varset['attributes']['name']} (ID: {varset['id']})")
     except Exception as e:
         print(f"Error listing variable sets: {e}")
 
 def update(name, description):
     try:
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        varset_id = None
-        for varset in varsets:
-            if varset.name == name:
-                varset_id = varset.id
-                break
+        varset_id = find_varset_id(name)
         
         if not varset_id:
-            print(f"Variable set with name {name} not found")
+            print(f"Variable set with name {name} not found{names.did_you_mean(org, 'varsets', name)}")
             return
         
         update_options = VariableSetUpdateOptions(
@@ -71,15 +89,10 @@ def update(name, description):
 
 def delete(name):
     try:
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        varset_id = None
-        for varset in varsets:
-            if varset.name == name:
-                varset_id = varset.id
-                break
+        varset_id = find_varset_id(name)
         
         if not varset_id:
-            print(f"Variable set with name {name} not found")
+            print(f"Variable set with name {name} not found{names.did_you_mean(org, 'varsets', name)}")
             return
         
         client.variable_sets.delete(varset_id)
@@ -87,21 +100,176 @@ def delete(name):
     except Exception as e:
         print(f"Error deleting variable set: {e}")
 
+def resolve_targets(workspace_names=None, project_names=None, select=None, tags=None, project=None):
+    """Resolve attachment targets to IDs with one listing per resource type
+    
+    Returns:
+        Tuple of ({workspace ID: name}, {project ID: name}, missing names)
+    """
+    workspaces, missing = bulk.workspaces_by_name(http, org, workspace_names) if workspace_names else ([], [])
+    if select or tags or project:
+        workspaces += bulk.select_workspaces(http, org, select=select, tags=tags, project=project)
+    projects = {}
+    if project_names:
+        listing = jsonapi.paginate(
+            http,
+            f"/api/v2/organizations/{org}/projects",
+            params={"filter[names]": ",".join(project_names), **jsonapi.sparse_fields("projects", "name")},
+        )
+        projects = {p["id"]: p["attributes"]["name"] for p in listing if p["attributes"]["name"] in project_names}
+        missing += [name for name in project_names if name not in projects.values()]
+    return {ws["id"]: ws["attributes"]["name"] for ws in workspaces}, projects, missing
+
+def change_attachments(varset_name, attach=True, workspace_names=None, project_names=None, select=None, tags=None, project=None, workers=bulk.DEFAULT_WORKERS, dry_run=False):
+    """Attach a variable set to (or detach it from) many workspaces and projects
+    
+    Targets are diffed against the current attachments, so only missing
+    (or present) ones are sent, in batches of bulk.RELATIONSHIP_BATCH.
+    """
+    action = "attach" if attach else "detach"
+    try:
+        varset_id = find_varset_id(varset_name)
+        if not varset_id:
+            print(f"Variable set '{varset_name}' not found{names.did_you_mean(org, 'varsets', varset_name)}")
+            return
+        
+        workspaces, projects, missing = resolve_targets(workspace_names, project_names, select, tags, project)
+        if missing:
+            print(f"Not found: {', '.join(missing)}")
+            return
+        
+        varset, _ = jsonapi.get(
+            http,
+            f"/api/v2/varsets/{varset_id}",
+            params=jsonapi.sparse_fields("varsets", "name", "workspaces", "projects"),
+        )
+        relationships = varset.get("relationships", {})
+        current = {
+            kind: {ref["id"] for ref in relationships.get(kind, {}).get("data") or []}
+            for kind in ("workspaces", "projects")
+        }
+        changes = []
+        for kind, targets in (("workspaces", workspaces), ("projects", projects)):
+            ids = sorted(targets.keys() - current[kind] if attach else targets.keys() & current[kind])
+            unchanged = len(targets) - len(ids)
+            if targets:
+                print(f"{kind.capitalize()}: {len(ids)} to {action}, {unchanged} already {action}ed")
+            for batch in bulk.chunked(ids):
+                changes.append((kind, [targets[i] for i in batch], batch))
+        
+        if dry_run:
+            for kind, target_names, _ in changes:
+                for name in target_names:
+                    print(f"- {kind[:-1]} {name}")
+            return
+        if not changes:
+            print("Nothing to change")
+            return
+        
+        async def apply(aclient, change):
+            kind, target_names, ids = change
+            if kind == "workspaces":
+                call = aclient.variable_sets.apply_to_workspaces if attach else aclient.variable_sets.remove_from_workspaces
+            else:
+                call = aclient.variable_sets.apply_to_projects if attach else aclient.variable_sets.remove_from_projects
+            await call(varset_id, ids)
+            return f"{len(ids)} {kind}"
+        
+        start = time.monotonic()
+        results = bulk.run(
+            changes,
+            apply,
+            workers=workers,
+            label=f"{action.capitalize()}ing",
+            key=lambda change: f"{change[0]} {change[1][0]}..{change[1][-1]}" if len(change[1]) > 1 else f"{change[0]} {change[1][0]}",
+        )
+        bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error {action}ing variable set: {e}")
+
+def clone(varset_name, to_name, to_org=None, secrets_file=None, workers=bulk.DEFAULT_WORKERS, dry_run=False):
+    """Copy a variable set and its variables, within or across organizations
+    
+    Sensitive values cannot be read back from the API, so they are taken from
+    secrets_file, keyed by variable key or "category:key" (e.g. env:AWS_SECRET_ACCESS_KEY).
+    """
+    to_org = to_org or org
+    try:
+        source = jsonapi.find_by_name(
+            http,
+            f"/api/v2/organizations/{org}/varsets",
+            "varsets",
+            varset_name,
+            fields=("description", "global", "priority"),
+            params={"q": varset_name},
+        )
+        if not source:
+            print(f"Variable set '{varset_name}' not found{names.did_you_mean(org, 'varsets', varset_name)}")
+            return
+        variables = [*jsonapi.paginate(http, f"/api/v2/varsets/{source['id']}/relationships/vars")]
+        
+        secrets = bulk.load_secrets(secrets_file) if secrets_file else {}
+        options = []
+        missing = []
+        for variable in variables:
+            attrs = variable["attributes"]
+            value = attrs.get("value")
+            if attrs.get("sensitive"):
+                value = bulk.secret_value(secrets, attrs)
+                if value is None:
+                    missing.append(f"{attrs['category']}:{attrs['key']}")
+            options.append((f"{attrs['category']}:{attrs['key']}", VariableSetVariableCreateOptions(
+                key=attrs["key"],
+                value=value,
+                description=attrs.get("description"),
+                category=attrs["category"],
+                hcl=attrs.get("hcl", False),
+                sensitive=attrs.get("sensitive", False),
+            )))
+        if missing:
+            print(f"Sensitive values missing from the secrets file: {', '.join(missing)}")
+            return
+        
+        print(f"Cloning {len(options)} variable(s) into '{to_name}' in organization '{to_org}'")
+        if dry_run:
+            for label, option in options:
+                print(f"- {label}{' (sensitive)' if option.sensitive else ''}")
+            return
+        
+        attrs = source["attributes"]
+        varset = client.variable_sets.create(
+            to_org,
+            VariableSetCreateOptions(
+                **{
+                    "name": to_name,
+                    "description": attrs.get("description"),
+                    "global": attrs.get("global", False),
+                    "priority": attrs.get("priority"),
+                }
+            ),
+        )
+        print(f"Created variable set: {varset.name} (ID: {varset.id})")
+        
+        async def copy(aclient, entry):
+            variable = await aclient.variable_set_variables.create(varset.id, entry[1])
+            return variable["id"]
+        
+        start = time.monotonic()
+        results = bulk.run(options, copy, workers=workers, label="Copying", key=lambda entry: entry[0])
+        bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error cloning variable set: {e}")
+
 # Variable Set Variable Management Functions
 
 def var_create(varset_name, key, value, description=None, category="terraform", sensitive=False, hcl=False):
     """Create a variable in a variable set"""
     try:
         # Find the variable set ID
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        varset_id = None
-        for varset in varsets:
-            if varset.name == varset_name:
-                varset_id = varset.id
-                break
+        varset_id = find_varset_id(varset_name)
         
         if not varset_id:
-            print(f"Variable set '{varset_name}' not found")
+            print(f"Variable set '{varset_name}' not found{names.did_you_mean(org, 'varsets', varset_name)}")
             return
         
         create_options = VariableSetVariableCreateOptions(
@@ -125,15 +293,10 @@ def var_read(varset_name, key=None, variable_id=None):
     """Read a variable from a variable set"""
     try:
         # Find the variable set ID
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        varset_id = None
-        for varset in varsets:
-            if varset.name == varset_name:
-                varset_id = varset.id
-                break
+        varset_id = find_varset_id(varset_name)
         
         if not varset_id:
-            print(f"Variable set '{varset_name}' not found")
+            print(f"Variable set '{varset_name}' not found{names.did_you_mean(org, 'varsets', varset_name)}")
             return
         
         variables = client.variable_set_variables.list(varset_id, VariableSetVariableListOptions())
@@ -175,15 +338,10 @@ def var_list(varset_name):
     """List all variables in a variable set"""
     try:
         # Find the variable set ID
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        varset_id = None
-        for varset in varsets:
-            if varset.name == varset_name:
-                varset_id = varset.id
-                break
+        varset_id = find_varset_id(varset_name)
         
         if not varset_id:
-            print(f"Variable set '{varset_name}' not found")
+            print(f"Variable set '{varset_name}' not found{names.did_you_mean(org, 'varsets', varset_name)}")
             return
         
         variables = client.variable_set_variables.list(varset_id, VariableSetVariableListOptions())
@@ -202,15 +360,10 @@ def var_update(varset_name, key=None, variable_id=None, value=None, description=
     """Update a variable in a variable set"""
     try:
         # Find the variable set ID
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        varset_id = None
-        for varset in varsets:
-            if varset.name == varset_name:
-                varset_id = varset.id
-                break
+        varset_id = find_varset_id(varset_name)
         
         if not varset_id:
-            print(f"Variable set '{varset_name}' not found")
+            print(f"Variable set '{varset_name}' not found{names.did_you_mean(org, 'varsets', varset_name)}")
             return
         
         # Find the variable ID if only key is provided
@@ -248,15 +401,10 @@ def var_delete(varset_name, key=None, variable_id=None):
     """Delete a variable from a variable set"""
     try:
         # Find the variable set ID
-        varsets = client.variable_sets.list(org, VariableSetListOptions())
-        varset_id = None
-        for varset in varsets:
-            if varset.name == varset_name:
-                varset_id = varset.id
-                break
+        varset_id = find_varset_id(varset_name)
         
         if not varset_id:
-            print(f"Variable set '{varset_name}' not found")
+            print(f"Variable set '{varset_name}' not found{names.did_you_mean(org, 'varsets', varset_name)}")
             return
         
         # Find the variable ID if only key is provided
@@ -283,7 +431,9 @@ if __name__ == "__main__":
     dotenv.load_dotenv()
     
     org = os.getenv("TFE_ORGANIZATION")
-    client = TFEClient(TFEConfig())
+    client = session.create_client()
+    # Raw JSON:API calls share the SDK client's connection pool
+    http = client._transport
     
     parser = argparse.ArgumentParser(description="Variable Set management CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -311,6 +461,23 @@ if __name__ == "__main__":
     delete_parser = subparsers.add_parser('delete', help='Delete a variable set')
     delete_parser.add_argument("--name", type=str, required=True, help="Name of the variable set to delete")
     
+    # Attach/detach commands
+    for name, help_text in (("attach", "Attach a variable set to workspaces and projects"), ("detach", "Detach a variable set from workspaces and projects")):
+        attach_parser = subparsers.add_parser(name, help=help_text)
+        attach_parser.add_argument("--varset", type=str, required=True, help="Name of the variable set")
+        attach_parser.add_argument("--workspaces", type=str, help="Comma-separated workspace names")
+        attach_parser.add_argument("--projects", type=str, help="Comma-separated project names")
+        bulk.add_selector_arguments(attach_parser, resume=False)
+    
+    # Clone command
+    clone_parser = subparsers.add_parser('clone', help='Copy a variable set and its variables')
+    clone_parser.add_argument("--varset", type=str, required=True, help="Name of the source variable set")
+    clone_parser.add_argument("--to-name", type=str, required=True, help="Name of the new variable set")
+    clone_parser.add_argument("--to-org", type=str, help="Organization to create it in (defaults to TFE_ORGANIZATION)")
+    clone_parser.add_argument("--secrets", type=str, help="YAML/JSON file with values for sensitive variables, keyed by key or category:key")
+    clone_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent requests")
+    clone_parser.add_argument("--dry-run", action="store_true", help="Show what would be copied without creating anything")
+    
     # Variable Set Variable commands
     # Var-create command
     var_create_parser = subparsers.add_parser('var-create', help='Create a variable in a variable set')
@@ -370,6 +537,34 @@ if __name__ == "__main__":
     elif args.command == 'delete':
         print(f"Deleting variable set: {args.name}")
         delete(name=args.name)
+    elif args.command in ('attach', 'detach'):
+        workspace_names = [n.strip() for n in (args.workspaces or "").split(",") if n.strip()]
+        project_names = [n.strip() for n in (args.projects or "").split(",") if n.strip()]
+        if workspace_names or project_names or bulk.has_selector(args):
+            print(f"{'Attaching' if args.command == 'attach' else 'Detaching'} variable set: {args.varset}")
+            change_attachments(
+                varset_name=args.varset,
+                attach=args.command == 'attach',
+                workspace_names=workspace_names,
+                project_names=project_names,
+                select=args.select,
+                tags=args.tags,
+                project=args.project,
+                workers=args.workers,
+                dry_run=args.dry_run
+            )
+        else:
+            print("Please provide --workspaces, --projects or a selector (--select, --tag, --project)")
+    elif args.command == 'clone':
+        print(f"Cloning variable set '{args.varset}' to '{args.to_name}'")
+        clone(
+            varset_name=args.varset,
+            to_name=args.to_name,
+            to_org=args.to_org,
+            secrets_file=args.secrets,
+            workers=args.workers,
+            dry_run=args.dry_run
+        )
     # Variable set variable commands
     elif args.command == 'var-create':
         print(f"Creating variable '{args.key}' in variable set '{args.varset}'")
@@ -1,25 +1,51 @@
 import argparse
+import hashlib
 import os
+import time
+from urllib.parse import urlparse
 import dotenv
+import yaml
 
-from pytfe import TFEClient, TFEConfig
+import bulk
+import jsonapi
+import journal
+import names
+import session
+from pytfe.errors import NotFound, TFEError
 from pytfe.models import (
-    ProjectListOptions,
+    Tag,
+    VariableCreateOptions,
     WorkspaceCreateOptions,
     WorkspaceListOptions,
+    WorkspaceLockOptions,
     WorkspaceUpdateOptions,
 )
 
+def find_project_ids(names):
+    """Resolve project names to IDs with a single filtered listing"""
+    projects = jsonapi.paginate(
+        http,
+        f"/api/v2/organizations/{org}/projects",
+        params={"filter[names]": ",".join(names), **jsonapi.sparse_fields("projects", "name")},
+    )
+    return {project["attributes"]["name"]: project["id"] for project in projects}
+
+def find_agent_pool_id(name):
+    """Find an agent pool ID by exact name, as agent_pools.py does"""
+    return jsonapi.find_id(
+        http,
+        f"/api/v2/organizations/{org}/agent-pools",
+        "agent-pools",
+        name,
+        params={"q": name},
+    )
+
 def create(name, project_id=None, project_name=None):
     try:
         if project_name and not project_id:
-            projects = client.projects.list(org, ProjectListOptions())
-            for project in projects:
-                if project.name == project_name:
-                    project_id = project.id
-                    break
-            else:
-                print(f"Project with name {project_name} not found")
+            project_id = find_project_ids([project_name]).get(project_name)
+            if not project_id:
+                print(f"Project with name {project_name} not found{names.did_you_mean(org, 'projects', project_name)}")
                 return
 
         create_options = WorkspaceCreateOptions(
@@ -32,6 +58,211 @@ def create(name, project_id=None, project_name=None):
     except Exception as e:
         print(f"Error creating workspace: {e}")
 
+def load_manifest(path):
+    """Load and validate a workspace manifest
+    
+    The manifest is a YAML (or JSON) document with a "workspaces" list.
+    Each entry needs a name and may set project (name) or project_id,
+    variables (a list of variable attributes) and any WorkspaceCreateOptions
+    field in snake_case or kebab-case. Keys under "defaults" apply to every
+    entry that does not set them.
+    
+    Returns:
+        List of (options dict, project name, project ID, variables) tuples
+    """
+    with open(path) as f:
+        document = yaml.safe_load(f) or {}
+    defaults = document.get("defaults") or {}
+    entries = []
+    for entry in document.get("workspaces") or []:
+        entry = {**defaults, **entry}
+        fields = {key.replace("-", "_"): value for key, value in entry.items()}
+        name = fields.get("name", "<unnamed>")
+        project_name = fields.pop("project", None)
+        project_id = fields.pop("project_id", None)
+        variables = [parse_manifest_variable(name, v) for v in fields.pop("variables", None) or []]
+        # Validate now so a typo fails before anything is created; the
+        # options model ignores unknown keys, so check them explicitly
+        unknown = sorted(set(fields) - set(WorkspaceCreateOptions.model_fields))
+        if unknown:
+            raise ValueError(f"Workspace '{name}' in {path}: unsupported setting(s) {', '.join(unknown)}")
+        WorkspaceCreateOptions(**fields)
+        entries.append((fields, project_name, project_id, variables))
+    return entries
+
+def parse_manifest_variable(workspace_name, attributes):
+    """Validate one manifest variable entry into VariableCreateOptions"""
+    fields = {key.replace("-", "_"): value for key, value in (attributes or {}).items()}
+    unknown = sorted(set(fields) - set(VariableCreateOptions.model_fields))
+    if unknown:
+        raise ValueError(f"Variable {fields.get('key', '<no key>')!r} of workspace '{workspace_name}': unsupported attribute(s) {', '.join(unknown)}")
+    if not fields.get("key"):
+        raise ValueError(f"Variable without a key in workspace '{workspace_name}'")
+    if fields.get("value") is None and not fields.get("sensitive"):
+        raise ValueError(f"Variable '{fields['key']}' of workspace '{workspace_name}' has no value")
+    return VariableCreateOptions(**fields)
+
+def create_from_manifest(path, workers=bulk.DEFAULT_WORKERS, dry_run=False, resume=False):
+    """Create every workspace in a manifest, seeding its variables
+    
+    Created workspace IDs and variables are journaled, so with resume a
+    workspace created before an interruption only gets its missing variables.
+    The journal is keyed on the manifest's content, so editing it starts afresh.
+    """
+    try:
+        entries = load_manifest(path)
+        with open(path, "rb") as f:
+            content = hashlib.sha1(f.read()).hexdigest()
+        run_journal = journal.open_journal(
+            "workspace-create",
+            {"org": org, "manifest": os.path.abspath(path), "content": content},
+            resume,
+            dry_run,
+        )
+        project_names = sorted({name for _, name, project_id, _ in entries if name and not project_id})
+        # Only journal the project IDs once they are all found, so a rerun
+        # after creating a missing project looks them up again
+        project_ids = run_journal.lookups.get("project-ids")
+        if project_ids is None:
+            project_ids = find_project_ids(project_names) if project_names else {}
+        missing = [name for name in project_names if name not in project_ids]
+        if missing:
+            print(f"Projects not found: {', '.join(missing)}")
+            return
+        run_journal.lookup("project-ids", lambda: project_ids)
+        
+        print(f"Manifest has {len(entries)} workspace(s) across {len(project_names)} project(s)")
+        if dry_run:
+            for fields, project_name, project_id, variables in entries:
+                project = project_id or project_name or "default project"
+                print(f"- {fields['name']} ({project}, {len(variables)} variable(s))")
+            return
+        
+        async def provision(aclient, entry):
+            fields, project_name, project_id, variables = entry
+            workspace_id = run_journal.lookups.get(f"workspace:{fields['name']}")
+            if not workspace_id:
+                project_id = project_id or project_ids.get(project_name)
+                options = WorkspaceCreateOptions(**fields, project={"id": project_id} if project_id else None)
+                workspace_id = (await aclient.workspaces.create(org, options))["id"]
+                run_journal.remember(f"workspace:{fields['name']}", workspace_id)
+            for variable in variables:
+                step = f"variable:{fields['name']}:{variable.key}"
+                if not run_journal.is_done(step):
+                    await aclient.variables.create(workspace_id, variable)
+                    run_journal.record(step, "ok")
+            return f"{workspace_id}, {len(variables)} variable(s)"
+        
+        with run_journal:
+            start = time.monotonic()
+            results = bulk.run(entries, provision, workers=workers, label="Creating", key=lambda entry: entry[0]["name"], journal=run_journal)
+            bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error creating workspaces: {e}")
+
+def clone(name, new_name, project_name=None, secrets_file=None, workers=bulk.DEFAULT_WORKERS, dry_run=False):
+    """Create a copy of a workspace with its variables, variable sets and policy sets
+    
+    Sensitive variable values cannot be read back, so they are taken from
+    secrets_file (keyed by key or category:key); if any is missing, nothing
+    is created. VCS settings are not copied.
+    """
+    try:
+        source, _ = jsonapi.get(
+            http,
+            f"/api/v2/organizations/{org}/workspaces/{name}",
+            params=jsonapi.sparse_fields("workspaces", *bulk.WORKSPACE_SETTINGS, "tag-names", "project", "agent-pool"),
+        )
+        attrs = source["attributes"]
+        relationships = source.get("relationships", {})
+        
+        if project_name:
+            project_id = find_project_ids([project_name]).get(project_name)
+            if not project_id:
+                print(f"Project with name {project_name} not found{names.did_you_mean(org, 'projects', project_name)}")
+                return
+        else:
+            project_id = (relationships.get("project", {}).get("data") or {}).get("id")
+        
+        fields = {field.replace("-", "_"): attrs[field] for field in bulk.WORKSPACE_SETTINGS if attrs.get(field) is not None}
+        agent_pool = (relationships.get("agent-pool", {}).get("data") or {}).get("id")
+        if agent_pool:
+            fields["agent_pool_id"] = agent_pool
+        options = WorkspaceCreateOptions(
+            name=new_name,
+            project={"id": project_id} if project_id else None,
+            tags=[Tag(name=tag) for tag in attrs.get("tag-names") or []],
+            **fields,
+        )
+        
+        # Variables, and the variable sets and policy sets listing this workspace, in one listing each
+        variables = [*jsonapi.paginate(http, f"/api/v2/workspaces/{source['id']}/vars")]
+        varsets = [
+            varset for varset in jsonapi.paginate(
+                http,
+                f"/api/v2/organizations/{org}/varsets",
+                params=jsonapi.sparse_fields("varsets", "name", "workspaces"),
+            )
+            if any(ref["id"] == source["id"] for ref in varset.get("relationships", {}).get("workspaces", {}).get("data") or [])
+        ]
+        policy_sets = [
+            policy_set for policy_set in jsonapi.paginate(
+                http,
+                f"/api/v2/organizations/{org}/policy-sets",
+                params=jsonapi.sparse_fields("policy-sets", "name", "workspaces"),
+            )
+            if any(ref["id"] == source["id"] for ref in policy_set.get("relationships", {}).get("workspaces", {}).get("data") or [])
+        ]
+        
+        secrets = bulk.load_secrets(secrets_file) if secrets_file else {}
+        steps = []
+        missing = []
+        for variable in variables:
+            var_attrs = variable["attributes"]
+            value = var_attrs.get("value")
+            if var_attrs.get("sensitive"):
+                value = bulk.secret_value(secrets, var_attrs)
+                if value is None:
+                    missing.append(f"{var_attrs['category']}:{var_attrs['key']}")
+            create_options = VariableCreateOptions(
+                key=var_attrs["key"],
+                value=value,
+                description=var_attrs.get("description"),
+                category=var_attrs["category"],
+                hcl=var_attrs.get("hcl", False),
+                sensitive=var_attrs.get("sensitive", False),
+            )
+            steps.append((f"variable {var_attrs['category']}:{var_attrs['key']}", "variable", create_options))
+        if missing:
+            print(f"Sensitive values missing from the secrets file: {', '.join(missing)}")
+            return
+        steps += [(f"variable set {v['attributes']['name']}", "varset", v["id"]) for v in varsets]
+        steps += [(f"policy set {p['attributes']['name']}", "policy-set", p["id"]) for p in policy_sets]
+        
+        print(f"Copying {len(variables)} variable(s), {len(varsets)} variable set(s) and {len(policy_sets)} policy set(s)")
+        if dry_run:
+            for label, _, _ in steps:
+                print(f"- {label}")
+            return
+        
+        workspace = client.workspaces.create(org, options)
+        print(f"Created workspace: {workspace.name} (ID: {workspace.id})")
+        
+        async def copy(aclient, step):
+            _, kind, target = step
+            if kind == "variable":
+                await aclient.variables.create(workspace.id, target)
+            elif kind == "varset":
+                await aclient.variable_sets.apply_to_workspaces(target, [workspace.id])
+            else:
+                await aclient.policy_sets.add_workspaces(target, [workspace.id])
+        
+        start = time.monotonic()
+        results = bulk.run(steps, copy, workers=workers, label="Copying", key=lambda step: step[0])
+        bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error cloning workspace: {e}")
+
 def read(name):
     try:
         workspaces = client.workspaces.list(org, WorkspaceListOptions())
@@ -41,7 +272,7 @@ def read(name):
                 print(f"ID: {workspace.id}")
                 print(f"Description: {workspace.description}")
                 return
-        print(f"Workspace with name {name} not found")
+        print(f"Workspace with name {name} not found{names.did_you_mean(org, 'workspaces', name)}")
     except Exception as e:
         print(f"Error reading workspace: {e}")
 
@@ -53,16 +284,75 @@ def list():
     except Exception as e:
         print(f"Error listing workspaces: {e}")
 
-def update(name, description=None):
+# WorkspaceUpdateOptions fields that cannot be set from a key=value pair
+UNSETTABLE_FIELDS = {"name", "type", "vcs_repo", "setting_overwrites", "project", "tag_bindings"}
+
+def parse_settings(pairs, description=None):
+    """Parse --set key=value pairs into WorkspaceUpdateOptions fields
+    
+    Keys may be given as snake_case or kebab-case (auto-apply=true).
+    List fields such as trigger-prefixes take comma-separated values.
+    """
+    settings = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        field = key.strip().replace("-", "_")
+        if not sep or field not in WorkspaceUpdateOptions.model_fields or field in UNSETTABLE_FIELDS:
+            raise ValueError(f"Unsupported setting '{pair}'")
+        if field in ("trigger_prefixes", "trigger_patterns"):
+            settings[field] = [v for v in value.split(",") if v]
+        else:
+            settings[field] = value
+    if description:
+        settings["description"] = description
+    # Validate once up front instead of failing on every workspace
+    WorkspaceUpdateOptions(name="validation", **settings)
+    return settings
+
+def update(name, description=None, settings=None):
     try:
-        update_options = WorkspaceUpdateOptions()
-        if description:
-            update_options.description = description
+        settings = parse_settings(settings, description)
+        update_options = WorkspaceUpdateOptions(name=name, **settings)
         workspace = client.workspaces.update(name, update_options, organization=org)
         print(f"Successfully updated workspace: {workspace.name}")
     except Exception as e:
         print(f"Error updating workspace: {e}")
 
+def bulk_update(select=None, tags=None, project=None, description=None, settings=None, workers=bulk.DEFAULT_WORKERS, dry_run=False, resume=False):
+    """Apply the same settings to every workspace matching a selector"""
+    try:
+        settings = parse_settings(settings, description)
+        if not settings and not dry_run:
+            print("Please provide --set or --description")
+            return
+        
+        run_journal = journal.open_journal(
+            "workspace-update",
+            {"org": org, "select": select, "tags": tags, "project": project, "settings": settings},
+            resume,
+            dry_run,
+        )
+        workspaces = run_journal.lookup(
+            "workspaces",
+            lambda: bulk.select_workspaces(http, org, select=select, tags=tags, project=project),
+        )
+        print(f"Matched {len(workspaces)} workspace(s)")
+        if dry_run:
+            for workspace in workspaces:
+                print(f"- {workspace['attributes']['name']} (ID: {workspace['id']})")
+            return
+        
+        async def apply(aclient, workspace):
+            options = WorkspaceUpdateOptions(name=workspace["attributes"]["name"], **settings)
+            await aclient.workspaces.update_by_id(workspace["id"], options)
+        
+        with run_journal:
+            start = time.monotonic()
+            results = bulk.run(workspaces, apply, workers=workers, label="Updating", journal=run_journal)
+            bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error updating workspaces: {e}")
+
 def delete(name):
     try:
         client.workspaces.delete(name, organization=org)
@@ -70,20 +360,257 @@ def delete(name):
     except Exception as e:
         print(f"Error deleting workspace: {e}")
 
+def bulk_delete(select=None, tags=None, project=None, check=False, safe=False, workers=bulk.DEFAULT_WORKERS, dry_run=False, assume_yes=False, resume=False):
+    """Delete every workspace matching a selector
+    
+    Args:
+        check: Skip workspaces with an active run or managed resources
+        safe: Use the safe-delete endpoint, which refuses to delete workspaces managing resources
+    """
+    try:
+        run_journal = journal.open_journal(
+            "workspace-delete",
+            {"org": org, "select": select, "tags": tags, "project": project, "check": check, "safe": safe},
+            resume,
+            dry_run,
+        )
+        
+        def list_targets():
+            included = {}
+            workspaces = bulk.select_workspaces(
+                http,
+                org,
+                select=select,
+                tags=tags,
+                project=project,
+                fields=bulk.DELETE_CHECK_FIELDS if check else (),
+                params=bulk.DELETE_CHECK_PARAMS if check else None,
+                included=included,
+            )
+            return workspaces, jsonapi.index_included({"included": [*included.values()]})
+        
+        # Deleted workspaces drop out of a fresh listing, so resume from the
+        # original match. Only IDs and names are journaled: what --check looks
+        # at can change between runs, so a resumed run lists it again.
+        resumed = "targets" in run_journal.lookups
+        listed, included = list_targets() if check or not resumed else ([], {})
+        targets = run_journal.lookup(
+            "targets",
+            lambda: [{"type": "workspaces", "id": workspace["id"], "attributes": {"name": workspace["attributes"]["name"]}} for workspace in listed],
+        )
+        current = {workspace["id"]: workspace for workspace in listed}
+        workspaces = [current.get(target["id"], target) for target in targets]
+        print(f"Matched {len(workspaces)} workspace(s)")
+        if dry_run:
+            for workspace in workspaces:
+                blocker = bulk.delete_blocker(workspace, included) if check else None
+                note = f" - would skip: {blocker}" if blocker else ""
+                print(f"- {workspace['attributes']['name']} (ID: {workspace['id']}){note}")
+            return
+        if not workspaces:
+            return
+        if not bulk.confirm(f"Delete {len(workspaces)} workspace(s)?", assume_yes):
+            print("Aborted")
+            return
+        
+        async def remove(aclient, workspace):
+            if check and workspace["id"] not in current:
+                raise bulk.Skipped("no longer matches the selector, not re-checked")
+            if check:
+                blocker = bulk.delete_blocker(workspace, included)
+                if blocker:
+                    raise bulk.Skipped(blocker)
+            if safe:
+                await aclient.workspaces.safe_delete_by_id(workspace["id"])
+            else:
+                await aclient.workspaces.delete_by_id(workspace["id"])
+        
+        with run_journal:
+            start = time.monotonic()
+            results = bulk.run(workspaces, remove, workers=workers, label="Deleting", journal=run_journal)
+            bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error deleting workspaces: {e}")
+
+def open_lock_state(dry_run=False):
+    """Journal of the workspaces bulk_lock locked in this organization on TFE_ADDRESS"""
+    host = urlparse(os.getenv("TFE_ADDRESS", "https://app.terraform.io")).netloc or "default"
+    return journal.open_state(f"locks-{host.replace(':', '_')}-{org}", dry_run)
+
+def bulk_lock(select=None, tags=None, project=None, reason=None, workers=bulk.DEFAULT_WORKERS, dry_run=False):
+    """Lock every workspace matching a selector, recording the ones this locked
+    
+    Workspaces that are already locked are skipped and not recorded, so a
+    later unlock leaves them locked.
+    """
+    try:
+        workspaces = bulk.select_workspaces(http, org, select=select, tags=tags, project=project, fields=("name", "locked"))
+        print(f"Matched {len(workspaces)} workspace(s)")
+        if dry_run:
+            for workspace in workspaces:
+                note = " - already locked" if workspace["attributes"].get("locked") else ""
+                print(f"- {workspace['attributes']['name']} (ID: {workspace['id']}){note}")
+            return
+        
+        with open_lock_state() as locks:
+            async def lock(aclient, workspace):
+                if workspace["attributes"].get("locked"):
+                    raise bulk.Skipped("already locked")
+                try:
+                    await aclient.workspaces.lock(workspace["id"], WorkspaceLockOptions(reason=reason or "Locked by workspace.py"))
+                except TFEError as e:
+                    # Locked since it was listed, by someone else
+                    if e.status == 409:
+                        raise bulk.Skipped("already locked")
+                    raise
+                locks.remember(f"locked:{workspace['id']}", workspace["attributes"]["name"])
+            
+            start = time.monotonic()
+            results = bulk.run(workspaces, lock, workers=workers, label="Locking")
+            bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error locking workspaces: {e}")
+
+def bulk_unlock(select=None, tags=None, project=None, workers=bulk.DEFAULT_WORKERS, dry_run=False):
+    """Unlock the workspaces bulk_lock locked, optionally narrowed by a selector"""
+    try:
+        with open_lock_state(dry_run) as locks:
+            locked = {key.split(":", 1)[1]: name for key, name in locks.lookups.items() if key.startswith("locked:") and name}
+            if bulk.has_selector(argparse.Namespace(select=select, tags=tags, project=project)):
+                selected = {workspace["id"] for workspace in bulk.select_workspaces(http, org, select=select, tags=tags, project=project)}
+                locked = {workspace_id: name for workspace_id, name in locked.items() if workspace_id in selected}
+            workspaces = [{"id": workspace_id, "attributes": {"name": name}} for workspace_id, name in sorted(locked.items(), key=lambda item: item[1])]
+            print(f"{len(workspaces)} workspace(s) locked by workspace.py lock")
+            if dry_run:
+                for workspace in workspaces:
+                    print(f"- {workspace['attributes']['name']} (ID: {workspace['id']})")
+                return
+            if not workspaces:
+                return
+            
+            async def unlock(aclient, workspace):
+                try:
+                    await aclient.workspaces.unlock(workspace["id"])
+                except NotFound:
+                    # Deleted while locked; nothing left to unlock
+                    pass
+                except TFEError as e:
+                    # Already unlocked by hand; anything else (e.g. a run holding the lock) fails
+                    if e.status != 409 or "already unlocked" not in str(e).lower():
+                        raise
+                locks.remember(f"locked:{workspace['id']}", None)
+            
+            start = time.monotonic()
+            results = bulk.run(workspaces, unlock, workers=workers, label="Unlocking")
+            bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error unlocking workspaces: {e}")
+
+def set_execution(agent_pool, select=None, tags=None, project=None, workers=bulk.DEFAULT_WORKERS, dry_run=False, resume=False):
+    """Switch every workspace matching a selector to agent execution on one pool
+    
+    Workspaces the pool does not allow yet are added to its allowed-workspaces
+    list in a single update before any workspace is switched, since the API
+    rejects a pool the workspace is not allowed to use.
+    """
+    try:
+        pool_id = find_agent_pool_id(agent_pool)
+        if not pool_id:
+            print(f"Agent pool '{agent_pool}' not found{names.did_you_mean(org, 'agent-pools', agent_pool)}")
+            return
+        
+        run_journal = journal.open_journal(
+            "workspace-set-execution",
+            {"org": org, "select": select, "tags": tags, "project": project, "agent_pool": agent_pool},
+            resume,
+            dry_run,
+        )
+        workspaces = run_journal.lookup(
+            "workspaces",
+            lambda: bulk.select_workspaces(http, org, select=select, tags=tags, project=project, fields=("name", "execution-mode", "agent-pool")),
+        )
+        print(f"Matched {len(workspaces)} workspace(s)")
+        
+        pool = http.request(
+            "GET",
+            f"/api/v2/agent-pools/{pool_id}",
+            params=jsonapi.sparse_fields("agent-pools", "organization-scoped", "allowed-workspaces"),
+        ).json()["data"]
+        allowed = [item["id"] for item in (pool.get("relationships", {}).get("allowed-workspaces", {}).get("data") or [])]
+        allowed_ids = set(allowed)
+        missing = [] if pool["attributes"].get("organization-scoped") else [
+            workspace["id"] for workspace in workspaces if workspace["id"] not in allowed_ids
+        ]
+        assigned = lambda workspace: jsonapi.related_id(workspace, "agent-pool") == pool_id and workspace["attributes"].get("execution-mode") == "agent"
+        if dry_run:
+            if missing:
+                print(f"Would allow {len(missing)} workspace(s) on agent pool '{agent_pool}'")
+            for workspace in workspaces:
+                note = " - already on this pool" if assigned(workspace) else ""
+                print(f"- {workspace['attributes']['name']} (ID: {workspace['id']}){note}")
+            return
+        if not workspaces:
+            return
+        
+        if missing:
+            # The relationship is replaced as a whole, so one update allows every workspace
+            http.request(
+                "PATCH",
+                f"/api/v2/agent-pools/{pool_id}",
+                json_body={
+                    "data": {
+                        "type": "agent-pools",
+                        "id": pool_id,
+                        "relationships": {
+                            "allowed-workspaces": {"data": [{"type": "workspaces", "id": workspace_id} for workspace_id in allowed + missing]},
+                        },
+                    }
+                },
+            )
+            print(f"Allowed {len(missing)} workspace(s) on agent pool '{agent_pool}'")
+        
+        async def assign(aclient, workspace):
+            if assigned(workspace):
+                raise bulk.Skipped("already on this pool")
+            options = WorkspaceUpdateOptions(name=workspace["attributes"]["name"], execution_mode="agent", agent_pool_id=pool_id)
+            await aclient.workspaces.update_by_id(workspace["id"], options)
+        
+        with run_journal:
+            start = time.monotonic()
+            results = bulk.run(workspaces, assign, workers=workers, label="Assigning", journal=run_journal)
+            bulk.print_results(results, time.monotonic() - start)
+    except Exception as e:
+        print(f"Error setting execution mode: {e}")
+
 if __name__ == "__main__":
     dotenv.load_dotenv()
     
     org = os.getenv("TFE_ORGANIZATION")
-    client = TFEClient(TFEConfig())
+    client = session.create_client()
+    # Raw JSON:API calls share the SDK client's connection pool
+    http = client._transport
     
     parser = argparse.ArgumentParser(description="Workspace management CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # Create command
-    create_parser = subparsers.add_parser('create', help='Create a new workspace')
-    create_parser.add_argument("--name", type=str, required=True, help="Name of the workspace")
+    create_parser = subparsers.add_parser('create', help='Create a new workspace, or every workspace in a manifest')
+    create_parser.add_argument("--name", type=str, help="Name of the workspace")
     create_parser.add_argument("--project-id", type=str, help="Project ID")
     create_parser.add_argument("--project-name", type=str, help="Project name")
+    create_parser.add_argument("--manifest", type=str, help="YAML/JSON manifest of workspaces to create")
+    create_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent requests (with --manifest)")
+    create_parser.add_argument("--dry-run", action="store_true", help="Validate the manifest and show what would be created")
+    bulk.add_resume_argument(create_parser)
+    
+    # Clone command
+    clone_parser = subparsers.add_parser('clone', help='Copy a workspace with its variables, variable sets and policy sets')
+    clone_parser.add_argument("--name", type=str, required=True, help="Name of the workspace to copy")
+    clone_parser.add_argument("--new-name", type=str, required=True, help="Name of the new workspace")
+    clone_parser.add_argument("--project", type=str, help="Project name for the new workspace (defaults to the source's project)")
+    clone_parser.add_argument("--secrets", type=str, help="YAML/JSON file with values for sensitive variables, keyed by key or category:key")
+    clone_parser.add_argument("--workers", type=int, default=bulk.DEFAULT_WORKERS, help="Maximum concurrent requests")
+    clone_parser.add_argument("--dry-run", action="store_true", help="Show what would be copied without creating anything")
     
     # Read command
     read_parser = subparsers.add_parser('read', help='Read workspace details')
@@ -93,24 +620,59 @@ if __name__ == "__main__":
     list_parser = subparsers.add_parser('list', help='List all workspaces')
     
     # Update command
-    update_parser = subparsers.add_parser('update', help='Update a workspace')
-    update_parser.add_argument("--name", type=str, required=True, help="Name of the workspace to update")
+    update_parser = subparsers.add_parser('update', help='Update one workspace, or every workspace matching a selector')
+    update_parser.add_argument("--name", type=str, help="Name of the workspace to update")
     update_parser.add_argument("--description", type=str, help="New workspace description")
+    update_parser.add_argument("--set", type=str, action="append", dest="settings", metavar="KEY=VALUE", help="Workspace setting to change, e.g. auto-apply=true (can be repeated)")
+    bulk.add_selector_arguments(update_parser)
     
     # Delete command
-    delete_parser = subparsers.add_parser('delete', help='Delete a workspace')
-    delete_parser.add_argument("--name", type=str, required=True, help="Name of the workspace to delete")
+    delete_parser = subparsers.add_parser('delete', help='Delete one workspace, or every workspace matching a selector')
+    delete_parser.add_argument("--name", type=str, help="Name of the workspace to delete")
+    delete_parser.add_argument("--check", action="store_true", help="Skip workspaces with an active run or managed resources")
+    delete_parser.add_argument("--safe", action="store_true", help="Use safe-delete, which refuses workspaces that still manage resources")
+    delete_parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation")
+    bulk.add_selector_arguments(delete_parser)
+    
+    # Lock/unlock commands
+    lock_parser = subparsers.add_parser('lock', help='Lock every workspace matching a selector')
+    lock_parser.add_argument("--reason", type=str, help="Lock reason shown in the UI")
+    bulk.add_selector_arguments(lock_parser, resume=False)
+    unlock_parser = subparsers.add_parser('unlock', help='Unlock the workspaces locked by lock, optionally narrowed by a selector')
+    bulk.add_selector_arguments(unlock_parser, resume=False)
+    
+    # Set execution command
+    execution_parser = subparsers.add_parser('set-execution', help='Move every workspace matching a selector onto an agent pool')
+    execution_parser.add_argument("--agent-pool", type=str, required=True, help="Agent pool name")
+    bulk.add_selector_arguments(execution_parser)
     
     args = parser.parse_args()
     
     # Handle commands
     if args.command == 'create':
-        print(f"Creating workspace: {args.name}")
-        if args.project_id:
-            print(f"Project ID: {args.project_id}")
-        if args.project_name:
-            print(f"Project Name: {args.project_name}")
-        create(name=args.name, project_id=args.project_id, project_name=args.project_name)
+        if args.manifest:
+            print(f"Creating workspaces from manifest: {args.manifest}")
+            create_from_manifest(args.manifest, workers=args.workers, dry_run=args.dry_run, resume=args.resume)
+        elif args.name:
+            print(f"Creating workspace: {args.name}")
+            if args.project_id:
+                print(f"Project ID: {args.project_id}")
+            if args.project_name:
+                print(f"Project Name: {args.project_name}")
+            create(name=args.name, project_id=args.project_id, project_name=args.project_name)
+        else:
+            print("Please provide either --name or --manifest")
+            create_parser.print_help()
+    elif args.command == 'clone':
+        print(f"Cloning workspace '{args.name}' to '{args.new_name}'")
+        clone(
+            name=args.name,
+            new_name=args.new_name,
+            project_name=args.project,
+            secrets_file=args.secrets,
+            workers=args.workers,
+            dry_run=args.dry_run
+        )
     elif args.command == 'read':
         print(f"Reading workspace: {args.name}")
         read(name=args.name)
@@ -118,12 +680,62 @@ if __name__ == "__main__":
         print("Listing all workspaces")
         list()
     elif args.command == 'update':
-        print(f"Updating workspace: {args.name}")
-        if args.description:
-            print(f"New description: {args.description}")
-        update(name=args.name, description=args.description)
+        if bulk.has_selector(args):
+            print("Updating selected workspaces")
+            bulk_update(
+                select=args.select,
+                tags=args.tags,
+                project=args.project,
+                description=args.description,
+                settings=args.settings,
+                workers=args.workers,
+                dry_run=args.dry_run,
+                resume=args.resume
+            )
+        elif args.name:
+            print(f"Updating workspace: {args.name}")
+            if args.description:
+                print(f"New description: {args.description}")
+            update(name=args.name, description=args.description, settings=args.settings)
+        else:
+            print("Please provide either --name or a selector (--select, --tag, --project)")
+            update_parser.print_help()
     elif args.command == 'delete':
-        print(f"Deleting workspace: {args.name}")
-        delete(name=args.name)
+        if bulk.has_selector(args):
+            print("Deleting selected workspaces")
+            bulk_delete(
+                select=args.select,
+                tags=args.tags,
+                project=args.project,
+                check=args.check,
+                safe=args.safe,
+                workers=args.workers,
+                dry_run=args.dry_run,
+                assume_yes=args.yes,
+                resume=args.resume
+            )
+        elif args.name:
+            print(f"Deleting workspace: {args.name}")
+            delete(name=args.name)
+        else:
+            print("Please provide either --name or a selector (--select, --tag, --project)")
+            delete_parser.print_help()
+    elif args.command == 'lock':
+        if bulk.has_selector(args):
+            print("Locking selected workspaces")
+            bulk_lock(select=args.select, tags=args.tags, project=args.project, reason=args.reason, workers=args.workers, dry_run=args.dry_run)
+        else:
+            print("Please provide a selector (--select, --tag, --project)")
+            lock_parser.print_help()
+    elif args.command == 'unlock':
+        print("Unlocking workspaces")
+        bulk_unlock(select=args.select, tags=args.tags, project=args.project, workers=args.workers, dry_run=args.dry_run)
+    elif args.command == 'set-execution':
+        if bulk.has_selector(args):
+            print(f"Moving selected workspaces onto agent pool: {args.agent_pool}")
+            set_execution(args.agent_pool, select=args.select, tags=args.tags, project=args.project, workers=args.workers, dry_run=args.dry_run, resume=args.resume)
+        else:
+            print("Please provide a selector (--select, --tag, --project)")
+            execution_parser.print_help()
     else:
         parser.print_help()